@@ -1,6 +1,7 @@
 import PhotoSwipeLightbox from 'https://cdn.jsdelivr.net/npm/photoswipe@5.4.4/dist/photoswipe-lightbox.esm.min.js';
 import PhotoSwipe from 'https://cdn.jsdelivr.net/npm/photoswipe@5.4.4/dist/photoswipe.esm.min.js';
 import PdfViewer from '../components/pdfviewer.js';
+import { loadStaticGallery } from '../utils/gallery_data.js';
 
 // --- CONFIGURATION ---
 const SUPABASE_URL = 'https://tqfxvsozbeevwmfanqra.supabase.co';
@@ -11,7 +12,8 @@ const IMAGES_STORAGE_URL = `https://assets.vadim.guru/${IMAGES_BUCKET_NAME}`;
 const DRAWINGS_BUCKET_NAME = 'portfolio-drawings';
 const DRAWINGS_STORAGE_URL = `https://assets.vadim.guru/${DRAWINGS_BUCKET_NAME}`;
 
-const supabase = window.supabase.createClient(SUPABASE_URL, SUPABASE_KEY);
+// Static gallery data (data/galleries/<id>.json) points at the images deployed with the site
+const LOCAL_IMAGES_URL = '/images';
 
 // ----------------------
 
@@ -21,9 +23,13 @@ if(window.pdfjsLib) {
 }
 
 
+// Prerendered pages (galleries/<id>.html, built by tools/gallery_pages.py) already contain the gallery markup
+const contentRootElement = document.getElementById('gallery-content-root');
+const prerenderedID = contentRootElement ? contentRootElement.dataset.prerendered : undefined;
+
 // Get the Gallery ID from the URL parameters
 const urlParams = new URLSearchParams(window.location.search);
-const galleryID = urlParams.get('id');
+const galleryID = prerenderedID || urlParams.get('id');
 
 function getYouTubeID(url) {
     // Regex to extract the ID from various YouTube URL formats
@@ -32,7 +38,10 @@ function getYouTubeID(url) {
     return (match && match[2].length === 11) ? match[2] : null;
 }
 
-async function loadGallery() {
+async function fetchSupabaseGallery() {
+    // The Supabase client is only loaded on pages that fetch (not on prerendered pages)
+    const supabase = window.supabase.createClient(SUPABASE_URL, SUPABASE_KEY);
+
     // FETCH DEEP DATA
     // Select Gallery -> Sections -> Images
     const { data: gallery, error } = await supabase
@@ -49,6 +58,28 @@ async function loadGallery() {
 
     if(error) {
         console.error("Error fetching gallery data:", error);
+        return null;
+    }
+    return gallery;
+}
+
+async function loadGallery() {
+    // Both sources are requested at once. The static JSON only exists for galleries built from images/
+    // (folder ids); Supabase ids have none, so the Supabase query must not wait for that 404.
+    const staticRequest = loadStaticGallery(galleryID);
+    const supabaseRequest = fetchSupabaseGallery().catch(error => {
+        console.error("Error fetching gallery data:", error);
+        return null;
+    });
+
+    let gallery = await staticRequest;
+    let imagesURL = LOCAL_IMAGES_URL;
+    if(!gallery) {
+        gallery = await supabaseRequest;
+        imagesURL = IMAGES_STORAGE_URL;
+    }
+
+    if(!gallery) {
         renderErrorState();
         return;
     }
@@ -101,7 +132,7 @@ async function loadGallery() {
                 </video>
             `;
             const videoSource = document.getElementById('gallery-video-source');
-            videoSource.src = `${IMAGES_STORAGE_URL}/${gallery.folder}/${gallery.video}`;
+            videoSource.src = `${imagesURL}/${gallery.folder}/${gallery.video}`;
             videoContainer.querySelector('video').load();
         }
         
@@ -140,8 +171,13 @@ async function loadGallery() {
         // Safety check if images exist
         if(section.images && section.images.length > 0) {
             section.images.forEach(img => {
-                const fullSrc = `${IMAGES_STORAGE_URL}/${imgFolder}/${img.src}`;
-                const thumbSrc = `${IMAGES_STORAGE_URL}/${imgFolder}/${img.thumb}`;
+                const fullSrc = `${imagesURL}/${imgFolder}/${img.src}`;
+                const thumbSrc = `${imagesURL}/${imgFolder}/${img.thumb}`;
+
+                // Blurred placeholder + dominant color from the build (generate_galleries.py --lqip)
+                const placeholder = [img.color, img.lqip ? `url(${img.lqip}) center / cover no-repeat` : '']
+                    .filter(Boolean).join(' ');
+                const styleAttr = placeholder ? ` style="background: ${placeholder};"` : '';
 
                 imagesHTML += `
                     <a class="portfolio__item"
@@ -149,7 +185,7 @@ async function loadGallery() {
                         data-pswp-width="${img.width}"
                         data-pswp-height="${img.height}"
                         target="_blank">
-                        <img class="portfolio__img example-image" src="${thumbSrc}" alt="${img.alt || ''}">
+                        <img class="portfolio__img example-image" src="${thumbSrc}" alt="${img.alt || ''}"${styleAttr}>
                         <p class="portfolio__item_alt">${img.alt || ''}</p>
                     </a>
                 `;
@@ -209,4 +245,18 @@ function renderErrorState() {
     }
 }
 
-loadGallery();
\ No newline at end of file
+function initPrerenderedGallery() {
+    // Markup, sizes and order are already in the page: only attach the viewers
+    const pdfFile = contentRootElement.dataset.pdfFile;
+    if(pdfFile) {
+        new PdfViewer('gallery-drawing-container', `${DRAWINGS_STORAGE_URL}/${pdfFile}`);
+    }
+    initLightbox();
+}
+
+if(prerenderedID) {
+    initPrerenderedGallery();
+}
+else {
+    loadGallery();
+}
\ No newline at end of file
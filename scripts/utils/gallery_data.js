@@ -0,0 +1,117 @@
+// --- Static gallery data (written by tools/generate_galleries.py) ---
+// Galleries are either the readable format (sections -> image objects) or, with
+// `--format compact`, the columnar format decoded below. Mirrors tools/gallery_format.py.
+
+const COMPACT_FORMAT = 'columnar';
+const THUMB_SAME_AS_SRC = 0;
+const THUMB_SIBLING = 1;
+
+// Same folder as the gallery JSON files on disk
+const GALLERIES_URL = '/data/galleries';
+const INDEX_URL = '/data/gallery_index/index.json';
+
+// Keys of a compact section that are not per-image columns
+const SECTION_KEYS = new Set(['prefix', 'src', 'thumb', 'renditions', 'rendition_prefix', 'rendition_types']);
+
+function siblingThumb(src) {
+    const dot = src.lastIndexOf('.');
+    return dot > src.lastIndexOf('/') ? `${src.slice(0, dot)}_thumb${src.slice(dot)}` : `${src}_thumb`;
+}
+
+function expandSection(compact) {
+    const section = {};
+    const columns = [];
+    for(const [key, value] of Object.entries(compact)) {
+        if(SECTION_KEYS.has(key)) continue;
+        if(Array.isArray(value)) columns.push(key);
+        else section[key] = value;
+    }
+
+    section.images = compact.src.map((name, i) => {
+        const src = compact.prefix + name;
+        const thumb = compact.thumb[i];
+        const img = {
+            src,
+            thumb: thumb === THUMB_SAME_AS_SRC ? src : thumb === THUMB_SIBLING ? siblingThumb(src) : thumb,
+        };
+        columns.forEach(key => {
+            if(compact[key][i] !== null) img[key] = compact[key][i];
+        });
+        if(compact.renditions) {
+            img.renditions = compact.renditions[i].map(([file, width, height, typeIndex, bytes]) => ({
+                src: compact.rendition_prefix + file,
+                width,
+                height,
+                type: compact.rendition_types[typeIndex],
+                bytes,
+            }));
+        }
+        return img;
+    });
+    return section;
+}
+
+/**
+ * Returns the regular gallery object for either format.
+ */
+export function expandGallery(data) {
+    if(data.format !== COMPACT_FORMAT) return data;
+    const { format, version, sections, ...gallery } = data;
+    gallery.sections = sections.map(expandSection);
+    return gallery;
+}
+
+/**
+ * Fetches data/galleries/<id>.json. Returns null if the site has no static data for this gallery.
+ */
+export async function loadStaticGallery(id) {
+    if(!id || !/^[\w.-]+$/.test(id)) return null;
+    try {
+        const response = await fetch(`${GALLERIES_URL}/${encodeURIComponent(id)}.json`);
+        if(!response.ok) return null;
+        return expandGallery(await response.json());
+    }
+    catch(error) {
+        return null;
+    }
+}
+
+function expandIndexShard(shard) {
+    // -> [{ name, galleries: [{ id, title, location, url, thumb }] }] in page order
+    const categories = shard.categories.map(name => ({ name, galleries: [] }));
+    shard.id.forEach((id, i) => {
+        categories[shard.category[i]].galleries.push({
+            id,
+            title: shard.title[i],
+            location: shard.location[i],
+            url: shard.url ? shard.url[i] : undefined,
+            thumb: shard.thumb[i],
+        });
+    });
+    return categories;
+}
+
+/**
+ * Loads the home page index shard by shard (all requested at once, yielded in page order).
+ * Yields nothing if the site was built without `--format compact`.
+ */
+export async function* loadGalleryIndex() {
+    let index;
+    try {
+        const response = await fetch(INDEX_URL);
+        if(!response.ok) return;
+        index = await response.json();
+    }
+    catch(error) {
+        return;
+    }
+
+    const pending = index.shards.map(url => fetch(url)
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null));
+    yield expandIndexShard(index);
+    for(const request of pending) {
+        const shard = await request;
+        if(shard) yield expandIndexShard(shard);
+    }
+}
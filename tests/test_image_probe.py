@@ -0,0 +1,48 @@
+import io
+import os
+import sys
+import struct
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+from image_probe import PROBE_BYTES, probe_image
+
+Image = pytest.importorskip('PIL.Image')
+
+def jpeg_segment(marker, payload):
+    return b'\xff' + bytes([marker]) + struct.pack('>H', len(payload) + 2) + payload
+
+def exif_orientation(value):
+    # Little-endian TIFF header with one IFD entry: Orientation (0x0112), SHORT, count 1
+    tiff = b'II*\x00' + struct.pack('<I', 8) + struct.pack('<H', 1)
+    tiff += struct.pack('<HHIHH', 0x0112, 3, 1, value, 0) + struct.pack('<I', 0)
+    return b'Exif\x00\x00' + tiff
+
+def write_jpeg(path, size, segments):
+    """
+    Saves a JPEG of `size` with `segments` inserted right after SOI.
+    """
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (120, 30, 200)).save(buffer, 'JPEG')
+    data = buffer.getvalue()
+    with open(path, 'wb') as f:
+        f.write(data[:2] + b''.join(segments) + data[2:])
+
+def test_jpeg_after_segments_larger_than_the_probe_buffer(tmp_path):
+    # Two ~64 KB APP2 (ICC) segments push the frame header past the first PROBE_BYTES
+    icc = jpeg_segment(0xE2, b'ICC_PROFILE\x00' + b'\x00' * 65500)
+    path = tmp_path / 'icc.jpg'
+    write_jpeg(path, (123, 45), [icc, icc])
+
+    assert os.path.getsize(path) > 2 * PROBE_BYTES
+    assert probe_image(str(path)) == (123, 45, 1)
+
+def test_jpeg_exif_after_large_segment(tmp_path):
+    icc = jpeg_segment(0xE2, b'ICC_PROFILE\x00' + b'\x00' * 65500)
+    exif = jpeg_segment(0xE1, exif_orientation(6))
+    path = tmp_path / 'exif.jpg'
+    write_jpeg(path, (123, 45), [icc, exif, icc])
+
+    assert probe_image(str(path)) == (123, 45, 6)
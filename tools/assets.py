@@ -0,0 +1,358 @@
+import os
+import re
+import json
+import hashlib
+import posixpath
+
+# Configuration
+# Directories (relative to the site root) whose CSS/JS files get fingerprinted in production
+ASSET_DIRS = ['styles', 'scripts', 'fonts']
+ASSET_EXTENSIONS = {'.css', '.js'}
+HASH_LENGTH = 8
+
+# Maps original URL -> fingerprinted URL. Deployed with the site (useful for cache rules on the server).
+MANIFEST_FILE = 'asset-manifest.json'
+
+# Fingerprinted copies look like style.3f9a1c2b.css - never treat those as sources
+FINGERPRINTED_RE = re.compile(r'\.[0-9a-f]{%d}\.(css|js)$' % HASH_LENGTH)
+
+# href="..." / src="..." attributes in HTML
+HTML_REF_RE = re.compile(r'''((?:href|src)=)(["'])([^"']+)\2''')
+
+# Static ES module specifiers: import x from '...', import '...', export ... from '...', import('...')
+JS_IMPORT_RE = re.compile(r'''(\b(?:import|export)\b[^'"`;]*?\bfrom\s*|\bimport\s*\(?\s*)(["'])([^"']+)\2''')
+
+def is_external(url):
+    return url.startswith(("http:", "https:", "//", "#", "data:", "mailto:", "tel:"))
+
+def split_url(url):
+    """
+    Splits '/a/b.css?v=1#x' into ('/a/b.css', '?v=1#x').
+    """
+    match = re.match(r'([^?#]*)(.*)', url)
+    return match.group(1), match.group(2)
+
+def site_path(path, base_url):
+    """
+    Resolves a local path against the site path of the file that references it:
+    ('../images/a.jpg', '/styles/b.css') -> '/images/a.jpg'.
+    """
+    return path if path.startswith('/') else posixpath.normpath(posixpath.join(posixpath.dirname(base_url), path))
+
+# --- MINIFICATION ---
+
+def minify_css(css):
+    """
+    Conservative CSS minifier: drops comments and collapses whitespace around
+    braces, semicolons and commas. Strings are copied untouched.
+    """
+    out = []
+    i, n = 0, len(css)
+    while i < n:
+        c = css[i]
+        if c == '/' and css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if c in '"\'':
+            end = i + 1
+            while end < n and css[end] != c:
+                end += 2 if css[end] == '\\' else 1
+            out.append(css[i:end + 1])
+            i = end + 1
+            continue
+        if c.isspace():
+            while i < n and css[i].isspace():
+                i += 1
+            # Whitespace next to a brace, semicolon or comma carries no meaning
+            if out and out[-1] not in ('{', '}', ';', ',', ' ') and (i >= n or css[i] not in '{};,'):
+                out.append(' ')
+            continue
+        if c == '}' and out and out[-1] == ';':
+            out.pop()  # The last declaration in a block needs no semicolon
+        if c in '{};,' and out and out[-1] == ' ':
+            out.pop()
+        out.append(c)
+        i += 1
+
+    return ''.join(out).strip()
+
+# Characters after which a '/' starts a regular expression literal rather than a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%~^<>')
+REGEX_KEYWORDS_RE = r'(?:^|[^\w$.])(?:return|typeof|case|do|else|in|of|void|yield|await|delete|throw)$'
+
+def minify_js(js):
+    """
+    Conservative JS minifier: drops comments and collapses whitespace outside of
+    strings, template literals and regex literals. Newlines are kept (as single
+    newlines) so automatic semicolon insertion behaves exactly as before.
+    """
+    out = []
+    i, n = 0, len(js)
+
+    def starts_regex():
+        # A '/' starts a regex after an operator/opening bracket or a keyword like 'return'
+        previous = ''.join(out[-8:]).rstrip()
+        return not previous or previous[-1] in REGEX_PRECEDERS or re.search(REGEX_KEYWORDS_RE, previous)
+
+    def copy_template(start):
+        # Copies a `template ${literal}` including nested expressions, returns the end index
+        j = start + 1
+        while j < n:
+            ch = js[j]
+            if ch == '\\':
+                j += 2
+                continue
+            if ch == '`':
+                return j + 1
+            if ch == '$' and js.startswith('${', j):
+                depth, j = 1, j + 2
+                while j < n and depth:
+                    if js[j] == '`':
+                        j = copy_template(j)
+                        continue
+                    if js[j] in '"\'':
+                        quote, j = js[j], j + 1
+                        while j < n and js[j] != quote:
+                            j += 2 if js[j] == '\\' else 1
+                    elif js[j] == '{':
+                        depth += 1
+                    elif js[j] == '}':
+                        depth -= 1
+                    j += 1
+                continue
+            j += 1
+        return n
+
+    while i < n:
+        c = js[i]
+
+        if c == '/' and js.startswith('//', i):
+            end = js.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if c == '/' and js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            out.append(' ')
+            continue
+
+        if c in '"\'':
+            end = i + 1
+            while end < n and js[end] != c and js[end] != '\n':
+                end += 2 if js[end] == '\\' else 1
+            out.append(js[i:end + 1])
+            i = end + 1
+            continue
+
+        if c == '`':
+            end = copy_template(i)
+            out.append(js[i:end])
+            i = end
+            continue
+
+        if c == '/':
+            if starts_regex():
+                # Regex literal - copy up to the closing slash (respecting classes and escapes) plus flags
+                end, in_class = i + 1, False
+                while end < n and js[end] != '\n':
+                    ch = js[end]
+                    if ch == '\\':
+                        end += 2
+                        continue
+                    if ch == '[':
+                        in_class = True
+                    elif ch == ']':
+                        in_class = False
+                    elif ch == '/' and not in_class:
+                        break
+                    end += 1
+                end += 1
+                while end < n and (js[end].isalnum()):
+                    end += 1
+                out.append(js[i:end])
+                i = end
+                continue
+
+        if c.isspace():
+            start = i
+            while i < n and js[i].isspace():
+                i += 1
+            out.append('\n' if '\n' in js[start:i] else ' ')
+            continue
+
+        out.append(c)
+        i += 1
+
+    # Tidy up: no blank lines, no trailing spaces
+    lines = [line.strip() for line in ''.join(out).split('\n')]
+    return '\n'.join(line for line in lines if line) + '\n'
+
+# --- FINGERPRINTING ---
+
+class AssetFingerprinter:
+    """
+    Minifies CSS/JS assets and writes content-hashed copies next to the originals.
+    JS files are processed after the modules they import, so a change in a
+    dependency also changes the hash of every importer.
+    """
+
+    def __init__(self, root='.'):
+        self.root = root
+        self.manifest = {}  # '/styles/style.css' -> '/styles/style.3f9a1c2b.css'
+        self._in_progress = set()
+
+    def disk_path(self, url_path):
+        return os.path.join(self.root, *url_path.lstrip('/').split('/'))
+
+    def fingerprint(self, url_path):
+        """
+        Returns the fingerprinted URL for a local asset URL ('/scripts/x.js'), or None if it is not an asset.
+        """
+        if url_path in self.manifest:
+            return self.manifest[url_path]
+
+        ext = posixpath.splitext(url_path)[1].lower()
+        path = self.disk_path(url_path)
+        if ext not in ASSET_EXTENSIONS or FINGERPRINTED_RE.search(url_path) or not os.path.isfile(path):
+            return None
+
+        if url_path in self._in_progress:
+            print(f"  [!] Import cycle through {url_path}, leaving that import unhashed.")
+            return None
+        self._in_progress.add(url_path)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        if ext == '.js':
+            content = self.rewrite_js_imports(content, url_path)
+            content = minify_js(content)
+        else:
+            content = minify_css(content)
+
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        base, _ = posixpath.splitext(url_path)
+        hashed_url = f"{base}.{digest}{ext}"
+
+        hashed_path = self.disk_path(hashed_url)
+        if not os.path.exists(hashed_path):
+            with open(hashed_path, 'wb') as f:
+                f.write(data)
+
+        self._in_progress.discard(url_path)
+        self.manifest[url_path] = hashed_url
+        return hashed_url
+
+    def rewrite_js_imports(self, content, url_path):
+        """
+        Points relative/absolute module imports inside a JS file at the fingerprinted modules.
+        """
+        base_dir = posixpath.dirname(url_path)
+
+        def replace_match(match):
+            specifier = match.group(3)
+            if is_external(specifier) or not specifier.startswith(('/', './', '../')):
+                return match.group(0)  # Bare/CDN imports are left alone
+
+            path, suffix = split_url(specifier)
+            absolute = path if path.startswith('/') else posixpath.normpath(posixpath.join(base_dir, path))
+            hashed = self.fingerprint(absolute)
+            if not hashed:
+                return match.group(0)
+
+            if path.startswith('/'):
+                new_specifier = hashed
+            else:
+                # Keep the import relative, only the file name changes
+                new_specifier = posixpath.join(posixpath.dirname(path), posixpath.basename(hashed))
+                if not new_specifier.startswith('.'):
+                    new_specifier = './' + new_specifier
+            return f"{match.group(1)}{match.group(2)}{new_specifier}{suffix}{match.group(2)}"
+
+        return JS_IMPORT_RE.sub(replace_match, content)
+
+    def fingerprint_all(self):
+        """
+        Fingerprints every CSS/JS file under ASSET_DIRS.
+        """
+        for asset_dir in ASSET_DIRS:
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, asset_dir)):
+                for filename in sorted(filenames):
+                    rel = os.path.relpath(os.path.join(dirpath, filename), self.root).replace(os.sep, '/')
+                    self.fingerprint('/' + rel)
+        return self.manifest
+
+def rewrite_html_references(html_content, page_url, manifest):
+    """
+    Rewrites href/src attributes (and module imports in inline scripts) to the fingerprinted assets.
+    page_url is the page's own URL path, used to resolve relative references.
+    """
+    base_dir = posixpath.dirname(page_url)
+
+    def resolve(url):
+        path, suffix = split_url(url)
+        absolute = path if path.startswith('/') else posixpath.normpath(posixpath.join(base_dir, path))
+        hashed = manifest.get(absolute)
+        if not hashed:
+            return None
+        if path.startswith('/'):
+            return hashed + suffix
+        return posixpath.join(posixpath.dirname(path), posixpath.basename(hashed)) + suffix
+
+    def replace_attribute(match):
+        url = match.group(3)
+        new_url = None if is_external(url) else resolve(url)
+        if not new_url:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}{new_url}{match.group(2)}"
+
+    def replace_import(match):
+        url = match.group(3)
+        new_url = None if is_external(url) or not url.startswith(('/', './', '../')) else resolve(url)
+        if not new_url:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}{new_url}{match.group(2)}"
+
+    html_content = HTML_REF_RE.sub(replace_attribute, html_content)
+
+    # Inline <script type="module"> blocks may import local modules too
+    def replace_script(match):
+        return JS_IMPORT_RE.sub(replace_import, match.group(0))
+
+    return re.sub(r'<script\b[^>]*>.*?</script>', replace_script, html_content, flags=re.S)
+
+def load_manifest(root='.'):
+    path = os.path.join(root, MANIFEST_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  Warning: Could not read asset manifest '{path}': {e}")
+    return {}
+
+def build_asset_manifest(root='.'):
+    """
+    Production stage: fingerprints all assets, removes fingerprinted copies from
+    previous builds that are no longer referenced, and writes MANIFEST_FILE.
+    Returns the manifest.
+    """
+    previous = load_manifest(root)
+    fingerprinter = AssetFingerprinter(root)
+    manifest = dict(sorted(fingerprinter.fingerprint_all().items()))
+
+    # Clean up stale hashed copies
+    current = set(manifest.values())
+    for hashed_url in previous.values():
+        if hashed_url not in current:
+            stale_path = fingerprinter.disk_path(hashed_url)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+    with open(os.path.join(root, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"  [P] Fingerprinted {len(manifest)} assets (manifest: {MANIFEST_FILE})")
+    return manifest
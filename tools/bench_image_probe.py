@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import statistics
+
+from image_probe import probe_image, get_image_size, TRANSPOSED_ORIENTATIONS
+
+# Configuration
+DEFAULT_IMAGE_COUNT = 500
+FORMATS = ['.jpg', '.png', '.webp']
+REPEATS = 5
+
+def write_synthetic_image(path, width, height, orientation=1):
+    """
+    Writes a small real image of the given size (format picked from the extension).
+    JPEG/WebP files get an EXIF orientation tag when orientation != 1.
+    """
+    from PIL import Image
+
+    img = Image.new('RGB', (width, height), (random.randrange(256), random.randrange(256), random.randrange(256)))
+    ext = os.path.splitext(path)[1].lower()
+    exif = None
+    if orientation != 1 and ext in ('.jpg', '.jpeg', '.webp'):
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+
+    if ext in ('.jpg', '.jpeg'):
+        img.save(path, 'JPEG', quality=70, **({'exif': exif} if exif else {}))
+    elif ext == '.webp':
+        img.save(path, 'WEBP', quality=70, **({'exif': exif} if exif else {}))
+    else:
+        img.save(path, 'PNG')
+
+def build_synthetic_tree(root, count):
+    """
+    Fills root with `count` images spread across a few project folders.
+    Returns the list of file paths and the expected display size of each one.
+    """
+    random.seed(42)
+    files = []
+    for i in range(count):
+        folder = os.path.join(root, f"Project_{i % 8}")
+        os.makedirs(folder, exist_ok=True)
+
+        ext = FORMATS[i % len(FORMATS)]
+        width, height = random.randint(64, 640), random.randint(64, 640)
+        orientation = 6 if (ext != '.png' and i % 5 == 0) else 1
+
+        path = os.path.join(folder, f"Render_{i:05d}{ext}")
+        write_synthetic_image(path, width, height, orientation)
+
+        expected = (height, width) if orientation in TRANSPOSED_ORIENTATIONS else (width, height)
+        files.append((path, expected))
+    return files
+
+def pil_path(file_path):
+    # The previous implementation in get_images_from_folder
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        return img.size
+
+def time_it(fn, files):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for path, _ in files:
+            fn(path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def run_benchmark(count=DEFAULT_IMAGE_COUNT):
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Error: Pillow is required to generate the synthetic tree and to time the PIL path.")
+        return 1
+
+    root = tempfile.mkdtemp(prefix='bench_probe_')
+    try:
+        print(f"Generating {count} synthetic images in {root}...")
+        files = build_synthetic_tree(root, count)
+
+        # Correctness first: the prober must agree with the expected display size
+        fallbacks = 0
+        for path, expected in files:
+            if probe_image(path) is None:
+                fallbacks += 1
+            actual = get_image_size(path)
+            if actual != expected:
+                print(f"  [!] Size mismatch for {os.path.basename(path)}: got {actual}, expected {expected}")
+                return 1
+
+        # Import Pillow once outside the timed loop, like a long running build would
+        pil_path(files[0][0])
+
+        t_pil = time_it(pil_path, files)
+        t_probe = time_it(get_image_size, files)
+
+        print(f"\n  {'Method':<20}{'Total (ms)':>12}{'Per image (µs)':>18}")
+        print(f"  {'PIL Image.open':<20}{t_pil * 1000:>12.1f}{t_pil / count * 1e6:>18.1f}")
+        print(f"  {'Header probe':<20}{t_probe * 1000:>12.1f}{t_probe / count * 1e6:>18.1f}")
+        print(f"\n  Speedup: {t_pil / t_probe:.1f}x   (Pillow fallbacks: {fallbacks})")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    # Usage: python tools/bench_image_probe.py [image_count]
+    image_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_IMAGE_COUNT
+    sys.exit(run_benchmark(image_count))
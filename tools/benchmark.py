@@ -0,0 +1,326 @@
+import os
+import io
+import sys
+import json
+import time
+import zlib
+import struct
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+# Configuration
+RESULTS_DIR = '.build/bench'
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'baseline.json')
+DEFAULT_THRESHOLD = 0.15  # Fail if a p50 gets more than 15% slower than the baseline
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- SYNTHETIC TREES ---
+
+_png_cache = {}
+
+def tiny_png(width, height):
+    """
+    Returns the bytes of a valid, all-black RGB PNG of the given size.
+    Cached per size, so writing tens of thousands of files stays cheap (and needs no Pillow).
+    """
+    key = (width, height)
+    if key not in _png_cache:
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+        raw = b''.join(b'\x00' + b'\x00' * (width * 3) for _ in range(height))
+        _png_cache[key] = (b'\x89PNG\r\n\x1a\n'
+                           + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+                           + chunk(b'IDAT', zlib.compress(raw, 9))
+                           + chunk(b'IEND', b''))
+    return _png_cache[key]
+
+def build_image_tree(root, image_count, folder_count, subsection_count):
+    """
+    Creates root/images/<Gallery>/... with nested subsection folders, metadata.json
+    overrides on every third gallery and _thumb siblings for every fourth image.
+    """
+    from generate_galleries import CATEGORY_ORDER
+
+    random.seed(1234)
+    sizes = [(random.choice([64, 96, 128, 160]), random.choice([48, 72, 96, 120])) for _ in range(8)]
+    folders = [f"Gallery_{i:04d}" for i in range(folder_count)]
+
+    for index, folder in enumerate(folders):
+        folder_path = os.path.join(root, 'images', folder)
+        os.makedirs(folder_path, exist_ok=True)
+        for s in range(subsection_count):
+            os.makedirs(os.path.join(folder_path, f"Sub_{s}"), exist_ok=True)
+
+        if index % 3 == 0:
+            metadata = {
+                "title": f"Project {index}",
+                "location": "Lancaster, PA",
+                "category": CATEGORY_ORDER[index % len(CATEGORY_ORDER)],
+                "image_prefix": "P_",
+                "cover_image": "P_0000_Lobby_v2.png",
+            }
+            if subsection_count:
+                metadata["subsections"] = {"Interiors": ["Sub_0"]}
+            with open(os.path.join(folder_path, 'metadata.json'), 'w') as f:
+                json.dump(metadata, f)
+
+    for i in range(image_count):
+        folder_index = i % folder_count
+        folder_path = os.path.join(root, 'images', folders[folder_index])
+        slot = (i // folder_count) % (subsection_count + 1)
+        target = folder_path if slot == 0 else os.path.join(folder_path, f"Sub_{slot - 1}")
+
+        prefix = "P_" if folder_index % 3 == 0 else ""
+        name = f"{prefix}{i:04d}_Lobby_v2" if i < folder_count else f"{prefix}{i:06d}_RenderViewCamera_v{i % 9}"
+        data = tiny_png(*sizes[i % len(sizes)])
+        with open(os.path.join(target, f"{name}.png"), 'wb') as f:
+            f.write(data)
+        if i % 4 == 0:
+            with open(os.path.join(target, f"{name}_thumb.png"), 'wb') as f:
+                f.write(tiny_png(32, 24))
+
+    os.makedirs(os.path.join(root, 'data', 'galleries'), exist_ok=True)
+
+def build_template_tree(root, page_count, component_count):
+    """
+    Creates synthetic templates/components. Every page uses every component, at varying indentation.
+    Returns (COMPONENTS, PAGES) mappings for build_site.
+    """
+    components = {}
+    for c in range(component_count):
+        placeholder = f"<!-- BENCH{c} TEMPLATE -->"
+        filename = f"bench{c}.html"
+        components[placeholder] = filename
+        lines = [f'<div class="bench-{c}">'] + [f'    <a href="/pages/page{j}.html" class="link">Link {j}</a>' for j in range(40)] + ['</div>']
+        os.makedirs(os.path.join(root, 'components'), exist_ok=True)
+        with open(os.path.join(root, 'components', filename), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+
+    pages = {}
+    os.makedirs(os.path.join(root, 'templates', 'pages'), exist_ok=True)
+    for p in range(page_count):
+        body = []
+        for c, placeholder in enumerate(components):
+            body.append(' ' * (4 * (c % 4 + 1)) + placeholder)
+            body.extend(f'        <p>Paragraph {k} of page {p} with <a href="/pages/page{k}.html">a link</a>.</p>' for k in range(50))
+        html = '<!DOCTYPE html>\n<html lang="en">\n    <head>\n        <title>Bench</title>\n    </head>\n    <body>\n' + '\n'.join(body) + '\n    </body>\n</html>'
+        template_name = f"pages/page{p}_template.html"
+        with open(os.path.join(root, 'templates', template_name), 'w', encoding='utf-8') as f:
+            f.write(html)
+        pages[template_name] = f"pages/page{p}.html"
+
+    # generate_site only needs images/ (it writes data/galleries and .build/components/portfolio.html);
+    # build_site renders just these synthetic templates, so no index template is needed
+    return components, pages
+
+# --- CASES ---
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_case(case, tree_root, repeats, components, pages):
+    """
+    Runs one benchmark case in a fresh worker process (so peak RSS is per case).
+    Returns the list of timings and the peak RSS in KB (None where unsupported).
+    """
+    sys.path.insert(0, TOOLS_DIR)
+    os.chdir(tree_root)
+
+    import build_site
+    import generate_galleries
+    from scan_cache import ScanCache
+
+    build_site.COMPONENTS = components
+    build_site.PAGES = pages
+    build_site.compile_template.cache_clear()  # The compiled pattern depends on COMPONENTS
+
+    folders = sorted(os.listdir(generate_galleries.IMAGES_DIR))
+    timings = []
+
+    def timed(fn):
+        start = time.perf_counter()
+        with quiet():
+            fn()
+        timings.append(time.perf_counter() - start)
+
+    name, mode = case.split(':')
+    cold = mode == 'cold'
+
+    if name == 'generate_site':
+        if not cold:
+            with quiet():
+                generate_galleries.generate_site()
+        for _ in range(repeats):
+            timed(lambda: generate_galleries.generate_site(force=cold))
+
+    elif name == 'build_gallery_data':
+        for _ in range(repeats):
+            if cold:
+                timed(lambda: [generate_galleries.build_gallery_data(f) for f in folders])
+            else:
+                cache = ScanCache()
+                with quiet():
+                    [generate_galleries.build_gallery_data(f, cache) for f in folders]
+                cache.save()
+                cache = ScanCache()
+                timed(lambda: [generate_galleries.build_gallery_data(f, cache) for f in folders])
+
+    elif name == 'build_site':
+        if not cold:
+            with quiet():
+                build_site.build_site()
+        for _ in range(repeats):
+            timed(lambda: build_site.build_site(force=cold))
+
+    elif name == 'clean_links_for_production':
+        with quiet():
+            rendered = list(build_site.render_pages().values())
+        # Cold = the first call in a fresh process (includes compiling the regex)
+        for _ in range(1 if cold else repeats + 1):
+            timed(lambda: [build_site.clean_links_for_production(html) for html in rendered])
+        if not cold:
+            timings.pop(0)
+
+    else:
+        raise ValueError(f"Unknown benchmark case {case}")
+
+    try:
+        import resource
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak_rss //= 1024  # macOS reports bytes
+    except ImportError:
+        peak_rss = None
+    return timings, peak_rss
+
+CASES = [
+    'generate_site:cold', 'generate_site:warm',
+    'build_gallery_data:cold', 'build_gallery_data:warm',
+    'build_site:cold', 'build_site:warm',
+    'clean_links_for_production:cold', 'clean_links_for_production:warm',
+]
+
+def run_benchmarks(args):
+    sys.path.insert(0, TOOLS_DIR)
+    tree_root = tempfile.mkdtemp(prefix='bench_build_')
+    results = {}
+    try:
+        print(f"Generating synthetic tree in {tree_root} "
+              f"({args.images} images, {args.folders} galleries, {args.pages} pages)...")
+        build_image_tree(tree_root, args.images, args.folders, args.subsections)
+        components, pages = build_template_tree(tree_root, args.pages, args.components)
+
+        spawn = multiprocessing.get_context('spawn')
+        for case in CASES:
+            if args.only and not any(case.startswith(o) for o in args.only):
+                continue
+
+            # Every case starts from the same state: no caches, no previous outputs
+            for generated in ('.build', os.path.join('data', 'galleries')):
+                shutil.rmtree(os.path.join(tree_root, generated), ignore_errors=True)
+            os.makedirs(os.path.join(tree_root, 'data', 'galleries'), exist_ok=True)
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                timings, peak_rss = pool.submit(run_case, case, tree_root, args.repeats, components, pages).result()
+
+            results[case] = {
+                "p50": percentile(timings, 0.5),
+                "p95": percentile(timings, 0.95),
+                "runs": len(timings),
+                "peak_rss_kb": peak_rss,
+            }
+            print(f"  {case:<34} p50 {results[case]['p50'] * 1000:>9.1f} ms   "
+                  f"p95 {results[case]['p95'] * 1000:>9.1f} ms   peak RSS {peak_rss or '-':>8} KB")
+    finally:
+        shutil.rmtree(tree_root, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "images": args.images,
+            "folders": args.folders,
+            "subsections": args.subsections,
+            "pages": args.pages,
+            "components": args.components,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+
+def compare_to_baseline(report, baseline_path, threshold):
+    """
+    Prints the p50 change of every case against the baseline.
+    Returns False if any case is slower than the threshold allows.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    if baseline['meta'].get('images') != report['meta']['images'] or baseline['meta'].get('pages') != report['meta']['pages']:
+        print("  ! Warning: Baseline was recorded with a different tree size, comparison is approximate.")
+
+    ok = True
+    print(f"\nCompared to baseline {baseline_path} (threshold +{threshold * 100:.0f}%):")
+    for case, result in report['results'].items():
+        previous = baseline['results'].get(case)
+        if not previous or not previous['p50']:
+            continue
+        change = result['p50'] / previous['p50'] - 1
+        regressed = change > threshold
+        ok = ok and not regressed
+        print(f"  {'[!]' if regressed else '[✓]'} {case:<34} {change * 100:>+7.1f}%")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site build on synthetic gallery/template trees.")
+    parser.add_argument('--images', type=int, default=1000, help="number of images (100 to 50000)")
+    parser.add_argument('--folders', type=int, default=20, help="number of gallery folders")
+    parser.add_argument('--subsections', type=int, default=2, help="nested subsection folders per gallery")
+    parser.add_argument('--pages', type=int, default=10, help="number of synthetic templates")
+    parser.add_argument('--components', type=int, default=6, help="number of synthetic components")
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs per case")
+    parser.add_argument('--only', nargs='*', help="only run cases starting with these names")
+    parser.add_argument('--output', help="where to write the results JSON (default: .build/bench/<timestamp>.json)")
+    parser.add_argument('--baseline', help=f"compare against this results file (default: {BASELINE_FILE} if it exists)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="allowed p50 slowdown, e.g. 0.15")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.save_baseline:
+        shutil.copyfile(output, BASELINE_FILE)
+        print(f"Saved as baseline ({BASELINE_FILE})")
+        return 0
+
+    baseline_path = args.baseline or (BASELINE_FILE if os.path.exists(BASELINE_FILE) else None)
+    if baseline_path and not compare_to_baseline(report, baseline_path, args.threshold):
+        print("\nPerformance regression detected.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
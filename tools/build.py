@@ -0,0 +1,289 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import build_site
+import precompress
+import page_weight
+from assets import MANIFEST_FILE
+from derivatives import RENDITIONS_DIR
+from gallery_format import INDEX_DIR
+from cli_args import get_format_arg, get_jobs_arg
+from generate_galleries import DATA_DIR, GALLERY_PAGES_DIR, PORTFOLIO_COMPONENT
+from map_markers import MARKERS_FILE
+
+# Configuration
+STATE_FILE = '.build/cache/build_stages.json'
+STATE_VERSION = 1
+
+# Every stage also depends on the build scripts themselves
+TOOLS_DIR = 'tools'
+
+# Never part of a stage's inputs: caches, fingerprinted copies and precompressed siblings written next to sources
+IGNORED_DIRNAMES = {'__pycache__', '.build', RENDITIONS_DIR}
+IGNORED_FILE_RE = re.compile(r'\.[0-9a-f]{8}\.(css|js)$|\.(gz|br|zst)$')
+
+# --- STAGES ---
+# Each stage runs in a worker process and only talks to the others through the files it writes.
+
+def run_galleries(options):
+    import generate_galleries
+    generate_galleries.generate_site(force=options['force'], jobs=options['jobs'], renditions=options['renditions'],
+                                     static_pages=options['static_pages'], output_format=options['format'],
+                                     lqip=options['lqip'])
+
+def run_skills_cloud(options):
+    build_site.generate_component('skills-cloud-layout.html')
+
+def run_fonts(options):
+    build_site.generate_component('fonts.html')
+
+def run_assets(options):
+    from assets import build_asset_manifest
+    manifest = build_asset_manifest(build_site.OUTPUT_DIR)
+    print(f"  [P] Fingerprinted {len(manifest)} asset(s)")
+
+def run_pages(options):
+    build_site.build_site(is_prod=options['production'], force=options['force'], staged=True)
+
+def run_gallery_pages(options):
+    import gallery_pages
+    gallery_pages.build_gallery_pages(is_prod=options['production'])
+
+def run_precompress(options):
+    precompress.precompress_site(jobs=options['jobs'] if options['jobs'] > 1 else None, force=options['force'])
+
+def run_page_weight(options):
+    return page_weight.analyze_site()
+
+# name -> stage. 'inputs' are files/folders whose changes re-run the stage, 'outputs' what it writes.
+# A stage also re-runs when the outputs of a stage it depends on ('deps') changed.
+# 'options' are the command line options that change the stage's outputs.
+STAGES = {
+    "galleries": {
+        "run": run_galleries, "deps": [],
+        "inputs": ['images', TOOLS_DIR],
+        "outputs": [DATA_DIR, INDEX_DIR, MARKERS_FILE, build_site.component_path(PORTFOLIO_COMPONENT)],
+        "options": ['renditions', 'static_pages', 'format', 'lqip'],
+    },
+    "skills_cloud": {
+        "run": run_skills_cloud, "deps": [],
+        "inputs": ['data/skills.json', 'fonts', TOOLS_DIR],
+        "outputs": [build_site.component_path('skills-cloud-layout.html')],
+        "options": [],
+    },
+    "assets": {
+        "run": run_assets, "deps": [], "when": 'production',
+        "inputs": ['styles', 'scripts', 'fonts', TOOLS_DIR],
+        "outputs": [MANIFEST_FILE],
+        "options": [],
+    },
+    # Subsets the fonts to the rendered pages, so it needs the generated portfolio and skills cloud
+    "fonts": {
+        "run": run_fonts, "deps": ['galleries', 'skills_cloud'],
+        "inputs": ['templates', 'components', 'styles', 'fonts', TOOLS_DIR],
+        "outputs": [build_site.component_path('fonts.html'), 'fonts/subset'],
+        "options": [],
+    },
+    "pages": {
+        "run": run_pages, "deps": ['galleries', 'skills_cloud', 'fonts', 'assets'],
+        "inputs": ['templates', 'components', 'styles', TOOLS_DIR],
+        "outputs": [os.path.join(build_site.OUTPUT_DIR, output_name) for output_name in build_site.PAGES.values()],
+        "options": ['production'],
+    },
+    "gallery_pages": {
+        "run": run_gallery_pages, "deps": ['galleries', 'fonts', 'assets', 'pages'], "when": 'static_pages',
+        "inputs": ['templates', 'components', 'styles', 'images', TOOLS_DIR],
+        "outputs": [GALLERY_PAGES_DIR],
+        "options": ['production'],
+    },
+    "precompress": {
+        "run": run_precompress, "deps": ['galleries', 'assets', 'fonts', 'pages', 'gallery_pages'], "when": 'production',
+        "inputs": ['images', 'scripts', 'styles', TOOLS_DIR],
+        "outputs": [precompress.STATE_FILE],
+        "options": [],
+    },
+    # Fails the build when a page is over its budget (page_weight.PAGE_BUDGETS). The budgets are for
+    # production output (minified, critical CSS inlined, fonts subset), so dev builds do not run it.
+    "page_weight": {
+        "run": run_page_weight, "deps": ['galleries', 'assets', 'fonts', 'pages', 'gallery_pages'], "when": 'production',
+        "inputs": ['images', 'scripts', 'styles', 'fonts', TOOLS_DIR],
+        "outputs": [page_weight.REPORT_JSON, page_weight.REPORT_HTML],
+        "options": [],
+    },
+}
+
+def run_stage(name, options):
+    """
+    Worker: runs one stage with its output captured, so parallel stages do not interleave their logs.
+    Returns (log, seconds, ok); a stage can also fail by returning False.
+    """
+    log = io.StringIO()
+    start = time.perf_counter()
+    ok = True
+    with contextlib.redirect_stdout(log):
+        try:
+            ok = STAGES[name]['run'](options) is not False
+        except Exception:
+            traceback.print_exc(file=log)
+            ok = False
+    return log.getvalue(), time.perf_counter() - start, ok
+
+# --- CACHING ---
+
+def is_ignored(path):
+    parts = path.replace(os.sep, '/').split('/')
+    return any(part in IGNORED_DIRNAMES for part in parts) or bool(IGNORED_FILE_RE.search(parts[-1]))
+
+def signature(paths, exclude=()):
+    """
+    Hashes the path, size and mtime of every file under `paths` (files or folders).
+    Folders listed in `exclude` (the outputs of the stages) are skipped.
+    """
+    h = hashlib.sha1()
+    for path in paths:
+        if not os.path.exists(path):
+            h.update(f"{path}:missing\n".encode('utf-8'))
+            continue
+        files = [path]
+        if os.path.isdir(path):
+            files = []
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames
+                                     if not is_ignored(os.path.join(dirpath, d)) and os.path.join(dirpath, d) not in exclude)
+                files += [os.path.join(dirpath, f) for f in sorted(filenames) if not is_ignored(f)]
+        for file in files:
+            stat = os.stat(file)
+            h.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return h.hexdigest()
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except Exception as e:
+            print(f"Warning: Could not read build state '{STATE_FILE}': {e}")
+    return {"version": STATE_VERSION, "stages": {}}
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+def stage_key(name, options, output_signatures, all_outputs):
+    """
+    Input hash of a stage: its inputs, the options it depends on and the outputs of its dependencies.
+    """
+    stage = STAGES[name]
+    h = hashlib.sha1(name.encode('utf-8'))
+    h.update(json.dumps({option: options[option] for option in stage['options']}, sort_keys=True).encode('utf-8'))
+    h.update(signature(stage['inputs'], exclude=all_outputs).encode('utf-8'))
+    for dep in stage['deps']:
+        h.update(f"{dep}:{output_signatures.get(dep)}".encode('utf-8'))
+    return h.hexdigest()
+
+# --- ORCHESTRATION ---
+
+def build(options):
+    """
+    Runs every enabled stage in dependency order. Stages whose dependencies are done run
+    concurrently; a stage whose input hash matches the last successful run is skipped.
+    Returns True if every stage succeeded.
+    """
+    enabled = [name for name, stage in STAGES.items() if 'when' not in stage or options[stage['when']]]
+    all_outputs = {path for stage in STAGES.values() for path in stage['outputs']}
+    state = load_state()
+
+    status, timings, output_signatures, keys = {}, {}, {}, {}
+    pending = list(enabled)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+        running = {}
+        while pending or running:
+            # Resolve everything that can start (cached stages can unblock others right away)
+            progress = True
+            while progress:
+                progress = False
+                for name in list(pending):
+                    deps = [dep for dep in STAGES[name]['deps'] if dep in enabled]
+                    if any(status.get(dep) in ('failed', 'skipped') for dep in deps):
+                        status[name] = 'skipped'
+                    elif all(dep in status for dep in deps):
+                        keys[name] = stage_key(name, options, output_signatures, all_outputs)
+                        previous = state['stages'].get(name, {})
+                        if (not options['force'] and previous.get('key') == keys[name]
+                                and previous.get('outputs') == signature(STAGES[name]['outputs'])):
+                            status[name] = 'cached'
+                            output_signatures[name] = previous['outputs']
+                            print(f"  [✓] {name}: up to date")
+                        else:
+                            running[pool.submit(run_stage, name, options)] = name
+                            print(f"  > {name}: started")
+                    else:
+                        continue
+                    pending.remove(name)
+                    progress = True
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    log, seconds, ok = future.result()
+                except Exception as e:
+                    log, seconds, ok = f"  {e}", 0.0, False  # The worker process itself died
+
+                print(f"\n--- {name} ({seconds:.2f}s) ---")
+                print(log.rstrip() or "  (no output)")
+                print()
+                timings[name] = seconds
+                if not ok:
+                    status[name] = 'failed'
+                    print(f"  [!] {name} failed, stages that depend on it are skipped.")
+                    state['stages'].pop(name, None)
+                    continue
+
+                status[name] = 'built'
+                output_signatures[name] = signature(STAGES[name]['outputs'])
+                state['stages'][name] = {"key": keys[name], "outputs": output_signatures[name]}
+
+    save_state(state)
+
+    wall = time.perf_counter() - start
+    print(f"  {'Stage':<16}{'Status':<10}{'Seconds':>8}")
+    for name in enabled:
+        seconds = f"{timings[name]:.2f}" if name in timings else '-'
+        print(f"  {name:<16}{status.get(name, 'skipped'):<10}{seconds:>8}")
+    print(f"  Wall time {wall:.2f}s, stage time {sum(timings.values()):.2f}s")
+    return all(status.get(name) in ('built', 'cached') for name in enabled)
+
+if __name__ == "__main__":
+    # Full site build in one command: gallery scan -> components -> assets -> pages -> gallery pages -> precompress, page weight
+    # --production fingerprints assets, cleans links and precompresses the output (what deploy.yml runs)
+    # --force re-runs every stage (and bypasses the caches inside them)
+    # --jobs N is passed to the gallery scan and precompression, --serial runs one stage at a time
+    # --static-pages, --renditions, --lqip and --format compact are passed to generate_galleries.py
+    options = {
+        "production": '--production' in sys.argv,
+        "force": '--force' in sys.argv,
+        "jobs": get_jobs_arg(sys.argv),
+        "workers": 1 if '--serial' in sys.argv else len(STAGES),
+        "static_pages": '--static-pages' in sys.argv,
+        "renditions": '--renditions' in sys.argv,
+        "lqip": '--lqip' in sys.argv,
+        "format": get_format_arg(sys.argv),
+    }
+    print(f"Starting Build (Production={options['production']})...")
+    sys.exit(0 if build(options) else 1)
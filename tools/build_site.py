@@ -1,12 +1,31 @@
 import os
 import re
 import sys
+import json
+import hashlib
+import functools
+import assets
+import critical_css
+from assets import build_asset_manifest, load_manifest, rewrite_html_references
+from critical_css import inline_critical_css, write_report as write_critical_css_report
+from profiler import span
+import profiler
+import skills_cloud
+import font_subset
 
 # Configuration
 COMPONENTS_DIR = "components"
 TEMPLATES_DIR = "templates"
 OUTPUT_DIR = '.' # Root directory
 
+# Dependency graph + content hashes from the last build (enables incremental builds)
+BUILD_STATE_FILE = '.build/cache/build_state.json'
+BUILD_STATE_VERSION = 1
+
+# Modules whose code shapes the built pages besides this script (reference rewriting, critical CSS,
+# generated components). Editing any of them invalidates every page.
+RENDER_MODULES = [assets, critical_css, skills_cloud, font_subset]
+
 # Mapping of Placeholder Comments -> Component Filenames
 # Ensure the HTML templates use the exact comment placeholders
 COMPONENTS = {
@@ -15,6 +34,20 @@ COMPONENTS = {
     "<!-- FOOTER TEMPLATE -->": "footer.html",
     "<!-- SKILLS TEMPLATE -->": "skills-cloud.html",
     "<!-- MAP TEMPLATE -->": "map.html",
+    "<!-- SKILLS CLOUD TEMPLATE -->": "skills-cloud-layout.html",
+    "<!-- FONTS TEMPLATE -->": "fonts.html",
+    "<!-- PORTFOLIO -->": "portfolio.html",
+}
+
+# Components produced by a build step rather than written by hand.
+# They are generated into GENERATED_COMPONENTS_DIR before any page is built, then used like the others.
+# In order: the font subsets are computed from pages that already contain the skills cloud and portfolio.
+# A None generator marks a component written by another script (portfolio.html: generate_galleries.py).
+GENERATED_COMPONENTS_DIR = '.build/components'
+GENERATED_COMPONENTS = {
+    "portfolio.html": None,
+    "skills-cloud-layout.html": skills_cloud.render_component,
+    "fonts.html": font_subset.render_component,
 }
 
 # Mapping of Template -> Output File
@@ -26,8 +59,28 @@ PAGES = {
     "404_template.html": "404.html",
 }
 
+def component_path(component_name):
+    directory = GENERATED_COMPONENTS_DIR if component_name in GENERATED_COMPONENTS else COMPONENTS_DIR
+    return os.path.join(directory, component_name)
+
+def generate_component(component_name):
+    """
+    Runs one component generator. Unchanged results are not rewritten, so the
+    incremental build only sees a change when the generated markup really differs.
+    """
+    generator = GENERATED_COMPONENTS[component_name]
+    if generator is None:
+        return
+    os.makedirs(GENERATED_COMPONENTS_DIR, exist_ok=True)
+    with span('generate_component', component=component_name):
+        write_if_changed(component_path(component_name), generator())
+
+def generate_components():
+    for component_name in GENERATED_COMPONENTS:
+        generate_component(component_name)
+
 def load_component(component_name):
-    filepath = os.path.join(COMPONENTS_DIR, component_name)
+    filepath = component_path(component_name)
     if os.path.exists(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
@@ -68,9 +121,232 @@ def clean_links_for_production(html_content):
     pattern = re.compile(r'(href=")([^"]+)(")')
     return re.sub(pattern, replace_match, html_content)
 
-def build_site(is_prod = False):       
-    # Pre-load all components into memory
-    loaded_components = load_all_components()
+def file_hash(path):
+    """
+    Returns the SHA-1 of a file's bytes, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def load_build_state():
+    if os.path.exists(BUILD_STATE_FILE):
+        try:
+            with open(BUILD_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == BUILD_STATE_VERSION:
+                return state
+        except Exception as e:
+            print(f"Warning: Could not read build state '{BUILD_STATE_FILE}': {e}")
+    return {"version": BUILD_STATE_VERSION, "config": None, "inputs": {}, "outputs": {}, "graph": {}}
+
+def save_build_state(state):
+    os.makedirs(os.path.dirname(BUILD_STATE_FILE), exist_ok=True)
+    with open(BUILD_STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+def find_dependencies(template_html, component_sources):
+    """
+    Returns the placeholders a template depends on, including placeholders
+    that only appear inside the components it pulls in.
+    """
+    used = set()
+    pending = [template_html]
+    while pending:
+        for segment in compile_template(pending.pop()):
+            if not isinstance(segment, str) and segment[0] not in used:
+                used.add(segment[0])
+                pending.append(component_sources.get(segment[0], ""))
+    # Keep COMPONENTS order so the graph file is stable between runs
+    return [placeholder for placeholder in COMPONENTS if placeholder in used]
+
+def write_if_changed(output_path, content):
+    """
+    Writes content to output_path only if the bytes differ from what is already on disk,
+    so unchanged outputs keep their mtime (friendlier to caches and rsync).
+    Returns True if the file was written.
+    """
+    data = content.encode('utf-8')
+    if os.path.exists(output_path):
+        with open(output_path, 'rb') as f:
+            if f.read() == data:
+                return False
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return True
+
+@functools.lru_cache(maxsize=256)
+def compile_template(text):
+    """
+    Compiles a template (or component) into a tuple of segments:
+    literal strings and (placeholder, indentation) pairs.
+    The indentation of a placeholder is taken from the first line where it is
+    preceded only by whitespace, and applies to every occurrence of it.
+    Cached by source text, so unchanged templates are only compiled once per process.
+    """
+    pattern = re.compile('|'.join(re.escape(placeholder) for placeholder in COMPONENTS))
+    matches = list(pattern.finditer(text))
+
+    # Detect indentation of each placeholder line
+    indentations = {}
+    for match in matches:
+        placeholder = match.group(0)
+        if placeholder in indentations:
+            continue
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        prefix = text[line_start:text.find(placeholder, line_start)]
+        if not prefix.strip():
+            indentations[placeholder] = prefix
+
+    segments = []
+    position = 0
+    for match in matches:
+        if match.start() > position:
+            segments.append(text[position:match.start()])
+        placeholder = match.group(0)
+        segments.append((placeholder, indentations.get(placeholder, '')))
+        position = match.end()
+    if position < len(text):
+        segments.append(text[position:])
+    return tuple(segments)
+
+def render_template(text, loaded_components, stack=()):
+    """
+    Renders compiled segments in a single pass. Components may contain other
+    placeholders; those are rendered recursively. A component that includes itself
+    (directly or through others) raises a ValueError.
+    """
+    parts = []
+    for segment in compile_template(text):
+        if isinstance(segment, str):
+            parts.append(segment)
+            continue
+
+        placeholder, indentation = segment
+        if placeholder in stack:
+            chain = ' -> '.join(COMPONENTS[p] for p in stack + (placeholder,))
+            raise ValueError(f"Component cycle detected: {chain}")
+
+        component_content = render_template(loaded_components.get(placeholder, ""), loaded_components, stack + (placeholder,))
+
+        # Apply indentation to component lines
+        component_lines = component_content.splitlines()
+        if component_lines:
+            # First line stays as-is (on the placeholder line)
+            parts.append(component_lines[0])
+            for line in component_lines[1:]:
+                parts.append('\n')
+                parts.append(indentation)
+                parts.append(line)
+        else:
+            # An empty (or missing) component leaves the placeholder untouched
+            parts.append(placeholder)
+    return ''.join(parts)
+
+def render_page(page_html, loaded_components, output_name, is_prod=False, verbose=True, asset_manifest=None, critical_report=None):
+    """
+    Injects the components into a template's HTML and returns the finished page.
+    In production, above-the-fold CSS is inlined (stats go into critical_report if given)
+    and asset_manifest (from assets.build_asset_manifest) points CSS/JS references at the fingerprinted files.
+    """
+    with span('render_template', 'page'):
+        result = render_template(page_html, loaded_components)
+
+    if verbose:
+        for placeholder in find_dependencies(page_html, loaded_components):
+            print(f"  [✓] Injected {COMPONENTS[placeholder]} into {output_name}")
+
+    # Production Cleanup (Only if flag is set)
+    if is_prod:
+        with span('inline_critical_css', 'page'):
+            result, critical_stats = inline_critical_css(result, OUTPUT_DIR)
+        if critical_stats and critical_report is not None:
+            critical_report[output_name.replace(os.sep, '/')] = critical_stats
+
+        with span('clean_links_for_production', 'page'):
+            result = clean_links_for_production(result)
+        if verbose:
+            print(f"  [P] Cleaned links for Production in {output_name}")
+
+        if asset_manifest:
+            with span('rewrite_html_references', 'page'):
+                result = rewrite_html_references(result, '/' + output_name.replace(os.sep, '/'), asset_manifest)
+            if verbose:
+                print(f"  [P] Rewrote asset references in {output_name}")
+
+    return result
+
+def render_pages(is_prod=False):
+    """
+    Renders every page in PAGES straight into memory. Returns { output_name: html }. Used by the dev server.
+    Outside production nothing is written to disk: generated components are rendered in memory and the
+    fonts are not subset (that scans every page), the pages link the full font stylesheets instead.
+    """
+    if is_prod:
+        generate_components()
+        loaded_components = load_all_components()
+    else:
+        loaded_components = {}
+        for placeholder, filename in COMPONENTS.items():
+            generator = GENERATED_COMPONENTS.get(filename)
+            if filename == font_subset.FONTS_COMPONENT:
+                loaded_components[placeholder] = font_subset.full_fonts_markup()
+            elif generator:
+                loaded_components[placeholder] = generator()
+            else:
+                loaded_components[placeholder] = load_component(filename)
+    pages = {}
+    for template_name, output_name in PAGES.items():
+        template_path = os.path.join(TEMPLATES_DIR, template_name)
+        if not os.path.exists(template_path):
+            continue
+        with open(template_path, 'r', encoding='utf-8') as f:
+            page_html = f.read()
+        pages[output_name] = render_page(page_html, loaded_components, output_name, is_prod, verbose=False)
+    return pages
+
+def build_site(is_prod = False, force = False, staged = False):
+    """
+    Builds every page in PAGES, skipping pages whose template, components,
+    build configuration and output are unchanged since the last build.
+    The dependency graph and content hashes are kept in BUILD_STATE_FILE,
+    so incremental builds also work from a cold start. force=True rebuilds everything.
+    staged=True is used by build.py, which has already generated the components and the asset manifest.
+    """
+    state = load_build_state()
+    if not staged:
+        generate_components()
+
+    # Production: minify + fingerprint CSS/JS first, pages then reference the hashed files
+    with span('build_asset_manifest'):
+        if not is_prod:
+            asset_manifest = None
+        elif staged:
+            asset_manifest = load_manifest(OUTPUT_DIR)
+        else:
+            asset_manifest = build_asset_manifest(OUTPUT_DIR)
+
+    # Changing this script (PAGES/COMPONENTS mappings, injection logic), a RENDER_MODULES module,
+    # the mode or any asset invalidates every page
+    sources = [os.path.abspath(__file__)] + [module.__file__ for module in RENDER_MODULES]
+    config_key = ':'.join(file_hash(path) for path in sources) + f":{'production' if is_prod else 'development'}"
+    if asset_manifest:
+        config_key += ':' + hashlib.sha1(json.dumps(asset_manifest, sort_keys=True).encode('utf-8')).hexdigest()
+    config_changed = state['config'] != config_key
+
+    # Hash every input once. These are small files, so a full read is cheaper than trusting mtimes.
+    component_paths = {placeholder: component_path(filename) for placeholder, filename in COMPONENTS.items()}
+    with span('hash_inputs'):
+        inputs = {path: file_hash(path) for path in component_paths.values()}
+        for template_name in PAGES:
+            template_path = os.path.join(TEMPLATES_DIR, template_name)
+            inputs[template_path] = file_hash(template_path)
+
+    # Components are only read from disk if some page actually needs rebuilding
+    loaded_components = None
+    critical_report = {}
+    rebuilt, written = 0, 0
 
     # Process each page
     for template_name, output_name in PAGES.items():
@@ -86,48 +362,71 @@ def build_site(is_prod = False):
                 print(f"Warning: Template file '{template_path}' not found. Skipping.")
             continue
 
-        with open(template_path, 'r', encoding='utf-8') as f:
-            page_html = f.read()
+        # Decide if this page is dirty
+        template_changed = state['inputs'].get(template_path) != inputs[template_path]
+        dependencies = state['graph'].get(template_name)
+        if not (force or config_changed or template_changed or dependencies is None):
+            components_changed = any(
+                state['inputs'].get(component_paths[placeholder]) != inputs[component_paths[placeholder]]
+                for placeholder in dependencies
+            )
+            output_changed = state['outputs'].get(output_path) != file_hash(output_path)
+            if not (components_changed or output_changed):
+                continue
 
-        for placeholder, component_content in loaded_components.items():
-            if placeholder in page_html:
-                # Detect indentation of the placeholder line
-                indentation = ''
-                for line in page_html.split('\n'):
-                    if placeholder in line:
-                        prefix = line[:line.find(placeholder)]
-                        if not prefix.strip():
-                            indentation = prefix
-                            break
-                
-                # Apply indentation to component lines
-                component_lines = component_content.splitlines()
-                if component_lines:
-                    indented_content = [component_lines[0]] # First line stays as-is (on the placeholder line)
-                    for line in component_lines[1:]:
-                        indented_content.append(indentation + line)
-                    formatted_content = '\n'.join(indented_content)
-
-                    # Perform the replacement
-                    page_html = page_html.replace(placeholder, formatted_content)
-
-                print(f"  [✓] Injected {COMPONENTS[placeholder]} into {output_name}")
-               
-        # Production Cleanup (Only if flag is set) 
-        if is_prod:
-            page_html = clean_links_for_production(page_html)
-            print(f"  [P] Cleaned links for Production in {output_name}")
+        if loaded_components is None:
+            # Pre-load all components into memory
+            with span('load_components'):
+                loaded_components = load_all_components()
+
+        with span('page', 'page', page=output_name):
+            with open(template_path, 'r', encoding='utf-8') as f:
+                page_html = f.read()
+
+            try:
+                state['graph'][template_name] = find_dependencies(page_html, loaded_components)
+                page_html = render_page(page_html, loaded_components, output_name, is_prod,
+                                        asset_manifest=asset_manifest, critical_report=critical_report)
+            except ValueError as e:
+                # Forget the graph entry so the page is retried on the next build
+                state['graph'].pop(template_name, None)
+                print(f"  [!] Error building {output_name}: {e}")
+                continue
+            rebuilt += 1
 
-        # Write the final HTML to output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(page_html)
-            
-        print(f"  Generated {output_path}")
+            # Write the final HTML to output file (only if the bytes changed)
+            with span('write', 'page'):
+                changed = write_if_changed(output_path, page_html)
+            if changed:
+                written += 1
+                print(f"  Generated {output_path}")
+            else:
+                print(f"  Unchanged {output_path}")
+            state['outputs'][output_path] = hashlib.sha1(page_html.encode('utf-8')).hexdigest()
+
+    if critical_report:
+        write_critical_css_report(critical_report)
+
+    state['config'] = config_key
+    state['inputs'] = inputs
+    save_build_state(state)
+
+    if rebuilt == 0:
+        print("  Nothing to rebuild, all pages are up to date.")
+    else:
+        print(f"  Rebuilt {rebuilt} page(s), {written} written to disk.")
 
 if __name__ == "__main__":    
     # Check for --prod argument
     is_prod_env = '--production' in sys.argv
+    # --force rebuilds every page, ignoring the saved build state
+    force_build = '--force' in sys.argv
+    # --profile writes a Chrome trace of the build to .build/profile/ and prints the slowest spans
+    if '--profile' in sys.argv:
+        profiler.enable('build_site')
 
     print(f"Starting Build Process (Production={is_prod_env})...")
-    build_site(is_prod=is_prod_env)
+    with span('build_site'):
+        build_site(is_prod=is_prod_env, force=force_build)
+    profiler.finish()
     print("Build Complete.")
\ No newline at end of file
@@ -0,0 +1,44 @@
+import os
+
+from gallery_format import GALLERY_FORMATS
+
+# Command line parsing shared by the build scripts. Importing it must stay cheap and free of side effects.
+
+def get_format_arg(argv):
+    """
+    Parses '--format NAME' (or '--format=NAME'). Defaults to the readable 'json' format.
+    """
+    for i, arg in enumerate(argv):
+        value = None
+        if arg == '--format' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--format='):
+            value = arg.split('=', 1)[1]
+
+        if value is not None:
+            if value in GALLERY_FORMATS:
+                return value
+            print(f"Warning: Unknown --format '{value}', expected one of {', '.join(GALLERY_FORMATS)}. Using json.")
+            return 'json'
+    return 'json'
+
+def get_jobs_arg(argv):
+    """
+    Parses '--jobs N' (or '--jobs=N') from the command line. Defaults to 1 (serial).
+    '--jobs 0' uses one worker per CPU core.
+    """
+    for i, arg in enumerate(argv):
+        value = None
+        if arg == '--jobs' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--jobs='):
+            value = arg.split('=', 1)[1]
+
+        if value is not None:
+            try:
+                jobs = int(value)
+            except ValueError:
+                print(f"Warning: Invalid --jobs value '{value}', running serially.")
+                return 1
+            return jobs if jobs > 0 else (os.cpu_count() or 1)
+    return 1
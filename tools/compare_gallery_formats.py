@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import gzip
+import time
+import shutil
+import tempfile
+
+from gallery_format import GALLERY_FORMATS, dumps_gallery, expand_gallery, load_gallery
+
+# Configuration
+DATA_DIR = 'data/galleries'
+PARSE_REPEATS = 20
+
+def load_site_galleries():
+    galleries = []
+    if os.path.isdir(DATA_DIR):
+        for filename in sorted(os.listdir(DATA_DIR)):
+            if filename.endswith('.json'):
+                galleries.append(load_gallery(os.path.join(DATA_DIR, filename)))
+    return galleries
+
+def synthetic_galleries(image_count):
+    """
+    Scans a throwaway tree from benchmark.py, so the formats can be compared without real galleries.
+    """
+    from benchmark import build_image_tree, quiet
+
+    root = tempfile.mkdtemp(prefix='gallery_formats_')
+    previous_dir = os.getcwd()
+    try:
+        build_image_tree(root, image_count, max(1, image_count // 200), 2)
+        os.chdir(root)
+        import generate_galleries
+        galleries = []
+        for folder in sorted(os.listdir(generate_galleries.IMAGES_DIR)):
+            with quiet():
+                gallery = generate_galleries.build_gallery_data(folder)
+            for section in gallery['sections']:
+                for img in section['images']:
+                    del img['filename'], img['path']
+            galleries.append(gallery)
+        return galleries
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(root, ignore_errors=True)
+
+def median_seconds(fn, repeats=PARSE_REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+def compare(galleries):
+    """
+    Prints the total raw/gzip size, JSON parse time and decode time (compact -> objects) per format.
+    Also checks that the compact format decodes back to exactly the same galleries.
+    """
+    print(f"Comparing {len(galleries)} galleries, {sum(len(s['images']) for g in galleries for s in g['sections'])} images:\n")
+    print(f"  {'Format':<10}{'Raw bytes':>12}{'Gzip bytes':>12}{'Parse ms':>12}{'Decode ms':>12}")
+
+    baseline = None
+    for output_format in GALLERY_FORMATS:
+        texts = [dumps_gallery(gallery, output_format) for gallery in galleries]
+        raw = sum(len(text.encode('utf-8')) for text in texts)
+        compressed = sum(len(gzip.compress(text.encode('utf-8'), mtime=0)) for text in texts)
+        parse = median_seconds(lambda: [json.loads(text) for text in texts])
+        parsed = [json.loads(text) for text in texts]
+        decode = median_seconds(lambda: [expand_gallery(data) for data in parsed])
+
+        if output_format == 'compact':
+            if [expand_gallery(data) for data in parsed] != galleries:
+                print("  [!] Compact format did not round-trip!")
+                return False
+
+        change = f"  ({(raw / baseline - 1) * 100:+.0f}% raw)" if baseline else ''
+        baseline = baseline or raw
+        print(f"  {output_format:<10}{raw:>12}{compressed:>12}{parse * 1000:>12.2f}{decode * 1000:>12.2f}{change}")
+    return True
+
+if __name__ == "__main__":
+    # Uses the generated data/galleries; --synthetic N compares a generated tree of N images instead
+    if '--synthetic' in sys.argv:
+        try:
+            count = int(sys.argv[sys.argv.index('--synthetic') + 1])
+        except (IndexError, ValueError):
+            count = 5000
+        galleries = synthetic_galleries(count)
+    else:
+        galleries = load_site_galleries()
+
+    if not galleries:
+        print(f"No galleries found in {DATA_DIR}. Run generate_galleries.py first, or use --synthetic N.")
+        sys.exit(1)
+    sys.exit(0 if compare(galleries) else 1)
@@ -0,0 +1,282 @@
+import os
+import re
+import json
+from html.parser import HTMLParser
+
+from assets import minify_css, is_external, site_path, split_url
+
+# Configuration
+# Only stylesheets from this folder are split into critical/deferred parts
+CRITICAL_STYLES_PREFIX = '/styles/'
+
+# Above-the-fold = everything in <body> up to the end of the first N <section> elements
+FOLD_SECTION_COUNT = 1
+
+REPORT_FILE = '.build/reports/critical-css.json'
+
+# Selectors that style the page canvas itself are always needed for the first paint
+ALWAYS_CRITICAL = {'html', 'body', ':root', '*'}
+
+STYLESHEET_LINK_RE = re.compile(r'<link\b[^>]*\brel=["\']stylesheet["\'][^>]*>', re.I)
+HREF_RE = re.compile(r'\bhref=(["\'])([^"\']+)\1', re.I)
+CSS_URL_RE = re.compile(r'''url\(\s*(["']?)([^"')]+)\1\s*\)''')
+
+# --- MARKUP ---
+
+class FoldCollector(HTMLParser):
+    """
+    Collects the tag names, classes, ids and attribute names used in a piece of markup.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.tags, self.classes, self.ids, self.attributes = set(), set(), set(), set()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag.lower())
+        for name, value in attrs:
+            self.attributes.add(name.lower())
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+def above_the_fold(html_content):
+    """
+    Returns the markup a visitor sees before scrolling: the <body> up to the end
+    of the first FOLD_SECTION_COUNT sections (the header comes before them).
+    """
+    body_start = html_content.find('<body')
+    if body_start == -1:
+        return html_content
+
+    end = body_start
+    for _ in range(FOLD_SECTION_COUNT):
+        next_end = html_content.find('</section>', end)
+        if next_end == -1:
+            return html_content[body_start:]
+        end = next_end + len('</section>')
+    return html_content[body_start:end]
+
+# --- CSS ---
+
+def find_block_end(css, start):
+    """
+    Returns the index of the '}' that closes the block opened at css[start] == '{'.
+    """
+    depth, i, n = 0, start, len(css)
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            i += 1
+            while i < n and css[i] != c:
+                i += 2 if css[i] == '\\' else 1
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return n
+
+def parse_css(css):
+    """
+    Parses (minified) CSS into a list of nodes:
+    ('rule', selector, body), ('block', at-rule prelude, [child nodes]) or ('at', statement).
+    """
+    nodes = []
+    i, n = 0, len(css)
+    while i < n:
+        brace = css.find('{', i)
+        semicolon = css.find(';', i)
+
+        # Statement at-rules like @import/@charset end at a semicolon
+        if css[i] == '@' and semicolon != -1 and (brace == -1 or semicolon < brace):
+            nodes.append(('at', css[i:semicolon + 1]))
+            i = semicolon + 1
+            continue
+        if brace == -1:
+            break
+
+        prelude = css[i:brace].strip()
+        end = find_block_end(css, brace)
+        body = css[brace + 1:end]
+
+        if prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            nodes.append(('block', prelude, parse_css(body)))
+        elif prelude.startswith('@'):
+            nodes.append(('block', prelude, body))  # @font-face, @keyframes... kept verbatim
+        else:
+            nodes.append(('rule', prelude, body))
+        i = end + 1
+    return nodes
+
+def split_selector_list(selector):
+    # Commas inside :is()/:not() must not split the list
+    parts, depth, current = [], 0, ''
+    for c in selector:
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        if c == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += c
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+def selector_matches(selector, fold):
+    """
+    True if every compound of the selector only uses tags/classes/ids/attributes present above the fold.
+    Pseudo-classes are ignored (a :hover rule for a visible button is still critical).
+    """
+    if selector in ALWAYS_CRITICAL:
+        return True
+
+    simplified = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+    attributes = re.findall(r'\[\s*([\w-]+)', simplified)
+    simplified = re.sub(r'\[[^\]]*\]', '', simplified)
+
+    if any(attribute.lower() not in fold.attributes for attribute in attributes):
+        return False
+
+    for compound in re.split(r'\s*[>+~]\s*|\s+', simplified.strip()):
+        if not compound or compound == '*':
+            continue
+        tag = re.match(r'[a-zA-Z][\w-]*', compound)
+        if tag and tag.group(0).lower() not in fold.tags:
+            return False
+        if any(c not in fold.classes for c in re.findall(r'\.([\w-]+)', compound)):
+            return False
+        if any(i not in fold.ids for i in re.findall(r'#([\w-]+)', compound)):
+            return False
+    return True
+
+def extract_critical(nodes, fold):
+    """
+    Returns the CSS text of the rules (and at-rule blocks) needed to paint the fold.
+    """
+    out = []
+    for node in nodes:
+        if node[0] == 'rule':
+            _, selector, body = node
+            used = [s for s in split_selector_list(selector) if selector_matches(s, fold)]
+            if used:
+                out.append(f"{','.join(used)}{{{body}}}")
+        elif node[0] == 'block':
+            _, prelude, children = node
+            if isinstance(children, list):
+                inner = extract_critical(children, fold)
+                if inner:
+                    out.append(f"{prelude}{{{inner}}}")
+            elif prelude.startswith('@font-face'):
+                out.append(f"{prelude}{{{children}}}")
+    return ''.join(out)
+
+def absolute_urls(css, stylesheet_path):
+    """
+    Rewrites the relative url() values of a stylesheet to root-absolute paths. Inlined into a page,
+    they would otherwise resolve against the page (e.g. /pages/) instead of the stylesheet.
+    """
+    def replace(match):
+        quote, url = match.group(1), match.group(2).strip()
+        if is_external(url) or url.startswith('/'):
+            return match.group(0)
+        path, suffix = split_url(url)
+        return f"url({quote}{site_path(path, stylesheet_path)}{suffix}{quote})"
+    return CSS_URL_RE.sub(replace, css)
+
+# --- PAGES ---
+
+def deferred_link(link_tag, href):
+    """
+    Turns a blocking <link rel="stylesheet"> into a preload that applies itself once loaded,
+    with a <noscript> fallback for visitors without JS.
+    """
+    preload = re.sub(r'\brel=["\']stylesheet["\']', 'rel="preload" as="style" onload="this.onload=null;this.rel=\'stylesheet\'"', link_tag, flags=re.I)
+    return f'{preload}<noscript>{link_tag}</noscript>'
+
+def inline_critical_css(html_content, root='.'):
+    """
+    Inlines the above-the-fold rules from the page's /styles/ stylesheets into <head>
+    and loads the full stylesheets asynchronously.
+    Returns (html, stats) where stats has the inlined and deferred byte counts.
+    """
+    head_end = html_content.find('</head>')
+    if head_end == -1:
+        return html_content, None
+
+    fold = FoldCollector()
+    fold.feed(above_the_fold(html_content))
+
+    head = html_content[:head_end]
+    critical_parts = []
+    stats = {"inlined_bytes": 0, "deferred_bytes": 0, "stylesheets": []}
+
+    def replace_link(match):
+        link_tag = match.group(0)
+        href_match = HREF_RE.search(link_tag)
+        if not href_match:
+            return link_tag
+        href = href_match.group(2)
+        path, _ = split_url(href)
+        disk_path = os.path.join(root, *path.lstrip('/').split('/'))
+        if is_external(href) or not path.startswith(CRITICAL_STYLES_PREFIX) or not os.path.isfile(disk_path):
+            return link_tag
+
+        with open(disk_path, 'r', encoding='utf-8') as f:
+            css = minify_css(f.read())
+
+        critical = absolute_urls(extract_critical(parse_css(css), fold), path)
+        media = re.search(r'\bmedia=["\']([^"\']+)["\']', link_tag)
+        if critical and media and media.group(1).strip() not in ('all', 'screen'):
+            critical = f"@media {media.group(1)}{{{critical}}}"
+        critical_parts.append(critical)
+
+        stats['stylesheets'].append({
+            "href": href,
+            "inlined_bytes": len(critical.encode('utf-8')),
+            "deferred_bytes": len(css.encode('utf-8')),
+        })
+        stats['deferred_bytes'] += len(css.encode('utf-8'))
+        return deferred_link(link_tag, href)
+
+    new_head = STYLESHEET_LINK_RE.sub(replace_link, head)
+    critical_css = ''.join(critical_parts)
+    if not stats['stylesheets']:
+        return html_content, None
+
+    stats['inlined_bytes'] = len(critical_css.encode('utf-8'))
+
+    # The inline block goes where the first deferred stylesheet used to be, keeping the cascade order
+    first_deferred = new_head.find('rel="preload" as="style"')
+    insert_at = new_head.rfind('<link', 0, first_deferred)
+    line_start = new_head.rfind('\n', 0, insert_at) + 1
+    indentation = new_head[line_start:insert_at] if not new_head[line_start:insert_at].strip() else ''
+    new_head = f'{new_head[:insert_at]}<style id="critical-css">{critical_css}</style>\n{indentation}{new_head[insert_at:]}'
+
+    return new_head + html_content[head_end:], stats
+
+def write_report(page_stats):
+    """
+    Merges this build's per-page numbers into REPORT_FILE (pages skipped by an
+    incremental build keep their previous entry) and prints a summary.
+    """
+    report = {}
+    if os.path.exists(REPORT_FILE):
+        try:
+            with open(REPORT_FILE, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except Exception:
+            report = {}
+    report.update(page_stats)
+
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    for page, stats in sorted(page_stats.items()):
+        print(f"  [P] Critical CSS {page}: {stats['inlined_bytes']} B inlined, {stats['deferred_bytes']} B deferred")
@@ -0,0 +1,206 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+# Configuration
+RENDITIONS_DIR = '_renditions'  # Created inside each gallery folder
+RENDITION_WIDTHS = [320, 640, 1280, 2560]
+RENDITION_FORMATS = ['webp', 'avif']
+THUMB_WIDTH = 640  # Rendition used as the thumbnail when no _thumb file exists
+
+MANIFEST_FILE = '.build/cache/renditions.json'
+
+# Encoder settings per format
+ENCODER_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'avif': {'quality': 60, 'speed': 6},
+}
+
+MIME_TYPES = {
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+}
+
+def supported_formats():
+    """
+    Returns the subset of RENDITION_FORMATS the installed Pillow can write.
+    AVIF needs Pillow >= 11.2 (or the pillow-avif-plugin package).
+    """
+    from PIL import Image, features
+
+    try:
+        import pillow_avif  # noqa: F401 - registers the AVIF plugin on older Pillow
+    except ImportError:
+        pass
+
+    formats = []
+    for fmt in RENDITION_FORMATS:
+        if fmt == 'webp' and features.check('webp'):
+            formats.append(fmt)
+        elif fmt == 'avif' and 'AVIF' in Image.SAVE:
+            formats.append(fmt)
+    return formats
+
+def rendition_name(digest, width, fmt):
+    return f"{digest[:16]}-{width}.{fmt}"
+
+def encode_renditions(src_path, digest, out_dir, formats):
+    """
+    Worker: decodes one source image and writes every width/format rendition into out_dir.
+    Runs in a separate process, so it only takes and returns plain data.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(out_dir, exist_ok=True)
+    renditions = []
+
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        src_width, src_height = img.size
+
+        # Never upscale: widths above the source collapse into a single full-size rendition
+        widths = [w for w in RENDITION_WIDTHS if w < src_width] + [min(src_width, RENDITION_WIDTHS[-1])]
+
+        # Resize from large to small, each step using the previous (already smaller) result
+        current = img
+        for width in sorted(set(widths), reverse=True):
+            height = max(1, round(src_height * width / src_width))
+            current = current.resize((width, height), Image.LANCZOS)
+
+            for fmt in formats:
+                name = rendition_name(digest, width, fmt)
+                out_path = os.path.join(out_dir, name)
+                current.save(out_path, fmt.upper(), **ENCODER_OPTIONS[fmt])
+                renditions.append({
+                    "file": name,
+                    "width": width,
+                    "height": height,
+                    "type": MIME_TYPES[fmt],
+                    "bytes": os.path.getsize(out_path),
+                })
+
+    renditions.sort(key=lambda r: (r['type'], r['width']))
+    return renditions
+
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  Warning: Could not read renditions manifest: {e}")
+    return {}
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'), sort_keys=True)
+
+def encode_all(pending, formats, jobs):
+    """
+    Encodes every pending (digest, out_dir) job and yields (key, renditions or the exception raised).
+    jobs == 1 encodes in this process; otherwise on a pool of `jobs` workers (None = one per core).
+    """
+    if jobs == 1:
+        for (digest, out_dir), imgs in pending.items():
+            try:
+                yield (digest, out_dir), encode_renditions(imgs[0]['path'], digest, out_dir, formats)
+            except Exception as e:
+                yield (digest, out_dir), e
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            key: pool.submit(encode_renditions, imgs[0]['path'], key[0], key[1], formats)
+            for key, imgs in pending.items()
+        }
+        for key, future in futures.items():
+            try:
+                yield key, future.result()
+            except Exception as e:
+                yield key, e
+
+def attach_renditions(galleries, images_dir, cache, jobs=None, force=False):
+    """
+    Creates the responsive renditions for every image in the scanned galleries and
+    adds a srcset-ready 'renditions' list to each image object.
+    Outputs are cached by the source content hash, so only new/changed photos are re-encoded.
+    """
+    try:
+        formats = supported_formats()
+    except ImportError:
+        print("  ! Warning: Pillow is not installed, skipping renditions.")
+        return
+
+    if 'avif' not in formats:
+        print("  ! Warning: This Pillow build cannot write AVIF, generating WebP only.")
+
+    manifest = {} if force else load_manifest()
+    pending = {}  # (digest, out_dir) -> list of image objects waiting for that job
+    referenced = {}  # out_dir -> set of rendition file names used by this build
+    seen = set()  # Digests of every image in this build
+
+    for folder_name, gallery_data in galleries:
+        if not gallery_data:
+            continue
+        out_dir = os.path.join(images_dir, folder_name, RENDITIONS_DIR)
+
+        for section in gallery_data['sections']:
+            for img in section['images']:
+                digest = cache.content_hash(img['path'])
+                cached = manifest.get(digest)
+                seen.add(digest)
+
+                # Reuse the previous encode if every output is still on disk for this gallery
+                if cached and cached['formats'] == formats and all(
+                        os.path.exists(os.path.join(out_dir, r['file'])) for r in cached['renditions']):
+                    apply_renditions(img, cached['renditions'])
+                    referenced.setdefault(out_dir, set()).update(r['file'] for r in cached['renditions'])
+                else:
+                    pending.setdefault((digest, out_dir), []).append(img)
+
+    if pending:
+        print(f"  Encoding renditions for {len(pending)} images ({', '.join(formats)})...")
+        for (digest, out_dir), renditions in encode_all(pending, formats, jobs):
+            if isinstance(renditions, Exception):
+                print(f"    Error encoding renditions for {pending[(digest, out_dir)][0]['path']}: {renditions}")
+                continue
+
+            manifest[digest] = {"formats": formats, "renditions": renditions}
+            referenced.setdefault(out_dir, set()).update(r['file'] for r in renditions)
+            for img in pending[(digest, out_dir)]:
+                apply_renditions(img, renditions)
+
+    # Remove renditions of photos that were deleted or changed since the last build
+    for out_dir, names in referenced.items():
+        for filename in os.listdir(out_dir):
+            if filename not in names:
+                os.remove(os.path.join(out_dir, filename))
+
+    # Drop manifest entries of photos that are no longer in any gallery (like ScanCache.save(prune=True))
+    manifest = {digest: entry for digest, entry in manifest.items() if digest in seen}
+    save_manifest(manifest)
+    print(f"  Renditions: {len(pending)} encoded, {sum(len(n) for n in referenced.values())} files in use.")
+
+def apply_renditions(img, renditions):
+    """
+    Adds the renditions (paths relative to the gallery root, like src/thumb) to an image object.
+    Images without a hand-made _thumb file get the THUMB_WIDTH WebP rendition as their thumbnail.
+    """
+    img['renditions'] = [
+        {
+            "src": f"{RENDITIONS_DIR}/{r['file']}",
+            "width": r['width'],
+            "height": r['height'],
+            "type": r['type'],
+            "bytes": r['bytes'],
+        }
+        for r in renditions
+    ]
+
+    if img['thumb'] == img['src']:
+        webp = [r for r in img['renditions'] if r['type'] == MIME_TYPES['webp']]
+        if webp:
+            thumb = next((r for r in webp if r['width'] >= THUMB_WIDTH), webp[-1])
+            img['thumb'] = thumb['src']
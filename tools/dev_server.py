@@ -0,0 +1,262 @@
+import os
+import sys
+import time
+import queue
+import threading
+import importlib
+import mimetypes
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, unquote
+
+import build_site
+import generate_galleries
+import watch
+
+# Configuration
+HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+LIVERELOAD_PATH = '/__livereload'
+NOT_FOUND_PAGE = '404.html'
+
+# Much shorter than the watcher's default: we only re-render in memory, so keep edit-to-pixels fast
+DEV_DEBOUNCE_SECONDS = 0.03
+
+# Seconds between keep-alive comments on idle SSE connections (also detects closed tabs)
+HEARTBEAT_SECONDS = 15
+
+# Injected before </body> of every rendered page.
+# 'css' events swap the matching stylesheet in place, 'reload' events refresh the page.
+LIVERELOAD_SNIPPET = f"""<script>
+(() => {{
+    const source = new EventSource('{LIVERELOAD_PATH}');
+    source.addEventListener('reload', () => location.reload());
+    source.addEventListener('css', (event) => {{
+        const changed = event.data;
+        let swapped = false;
+        document.querySelectorAll('link[rel="stylesheet"]').forEach(link => {{
+            const url = new URL(link.href, location.href);
+            if (url.origin === location.origin && url.pathname === changed) {{
+                url.searchParams.set('v', Date.now());
+                link.href = url.href;
+                swapped = true;
+            }}
+        }});
+        if (!swapped) location.reload();
+    }});
+}})();
+</script>
+"""
+
+class DevState:
+    """
+    Pages rendered in memory plus the connected live-reload clients.
+    """
+
+    def __init__(self):
+        self.is_prod = False  # --production renders clean links, like the deployed site
+        self.pages = {}
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def render(self):
+        start = time.perf_counter()
+        try:
+            pages = build_site.render_pages(is_prod=self.is_prod)
+        except Exception as e:
+            print(f"  [!] Error during build: {e}")
+            print("      Fix the error and save again.")
+            return False
+        with self.lock:
+            self.pages = {name.replace(os.sep, '/'): html for name, html in pages.items()}
+        print(f"  Rendered {len(pages)} page(s) in memory ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return True
+
+    def get_page(self, name):
+        with self.lock:
+            return self.pages.get(name)
+
+    def broadcast(self, event, data=''):
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.put((event, data))
+        if clients:
+            print(f"  ⇢ Sent '{event}' to {len(clients)} browser(s)")
+
+STATE = DevState()
+
+def resolve_page(url_path):
+    """
+    Maps a request path to a rendered page name, the way GitHub Pages resolves clean URLs:
+    '/' -> index.html, '/pages/contact' -> pages/contact.html, '/pages/' -> pages/index.html.
+    """
+    rel_path = url_path.lstrip('/')
+    candidates = [rel_path] if rel_path.endswith('.html') else [
+        f"{rel_path}.html" if rel_path and not rel_path.endswith('/') else None,
+        f"{rel_path}index.html" if not rel_path or rel_path.endswith('/') else f"{rel_path}/index.html",
+    ]
+    for candidate in candidates:
+        if candidate and STATE.get_page(candidate) is not None:
+            return candidate
+    return None
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves rendered pages from memory and everything else (styles, scripts, images, data) from disk.
+    """
+
+    def end_headers(self):
+        # Never let the browser cache anything during development
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for build output
+
+    def do_GET(self):
+        url_path = unquote(urlsplit(self.path).path)
+
+        if url_path == LIVERELOAD_PATH:
+            return self.serve_event_stream()
+
+        page_name = resolve_page(url_path)
+        if page_name:
+            return self.serve_page(page_name, 200)
+
+        # Static asset (with the same clean-URL fallback for files on disk)
+        disk_path = self.translate_path(url_path)
+        if os.path.isfile(disk_path) or os.path.isfile(disk_path + '.html'):
+            if not os.path.isfile(disk_path):
+                self.path = url_path + '.html'
+            return super().do_GET()
+
+        self.serve_page(NOT_FOUND_PAGE, 404)
+
+    def serve_page(self, page_name, status):
+        html = STATE.get_page(page_name)
+        if html is None:
+            self.send_error(status)
+            return
+
+        if '</body>' in html:
+            html = html.replace('</body>', LIVERELOAD_SNIPPET + '</body>', 1)
+        else:
+            html += LIVERELOAD_SNIPPET
+        body = html.encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_event_stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'keep-alive')
+        self.end_headers()
+
+        client = queue.Queue()
+        with STATE.lock:
+            STATE.clients.add(client)
+        try:
+            self.wfile.write(b': connected\n\n')
+            self.wfile.flush()
+            while True:
+                try:
+                    event, data = client.get(timeout=HEARTBEAT_SECONDS)
+                    message = f"event: {event}\ndata: {data}\n\n"
+                except queue.Empty:
+                    message = ": heartbeat\n\n"
+                self.wfile.write(message.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with STATE.lock:
+                STATE.clients.discard(client)
+
+def handle_changes(changed):
+    """
+    Re-renders in memory (never to disk) and tells the browsers what to do.
+    Stylesheet-only changes are hot swapped without a page reload.
+    """
+    kinds = {}
+    for path in changed:
+        kinds.setdefault(watch.classify_change(path), []).append(path)
+        print(f"  > Change detected in {os.path.relpath(path)}")
+
+    if 'config' in kinds:
+        print("  ↻ Configuration changed. Reloading build_site.py...")
+        try:
+            importlib.reload(build_site)
+            kinds.setdefault('pages', [])
+        except Exception as e:
+            print(f"  [!] Error reloading configuration: {e}")
+            return
+
+    if 'galleries-config' in kinds:
+        try:
+            importlib.reload(generate_galleries)
+            kinds.setdefault('galleries', [])
+        except Exception as e:
+            print(f"  [!] Error reloading generate_galleries.py: {e}")
+
+    if 'galleries' in kinds:
+        try:
+            generate_galleries.generate_site()
+            kinds.setdefault('pages', [])  # The portfolio component may have changed
+        except Exception as e:
+            print(f"  [!] Error during gallery generation: {e}")
+
+    if 'pages' in kinds and not STATE.render():
+        return  # Keep showing the last good build
+
+    # Only stylesheets changed: swap them in place
+    static = kinds.get('static', [])
+    css_only = kinds.keys() == {'static'} and all(p.endswith('.css') for p in static)
+    if css_only:
+        for path in static:
+            STATE.broadcast('css', '/' + os.path.relpath(path).replace(os.sep, '/'))
+    else:
+        STATE.broadcast('reload')
+
+def watch_loop(debounce):
+    watcher = watch.create_watcher()
+    while True:
+        changed = watch.wait_for_changes(watcher, debounce)
+        try:
+            handle_changes(changed)
+        except Exception as e:
+            print(f"  [!] Error handling change: {e}")
+
+def get_port_arg(argv):
+    if '--port' in argv:
+        try:
+            return int(argv[argv.index('--port') + 1])
+        except (IndexError, ValueError):
+            print(f"Warning: Invalid --port value, using {DEFAULT_PORT}.")
+    return DEFAULT_PORT
+
+def main():
+    port = get_port_arg(sys.argv)
+    debounce = watch.get_debounce_arg(sys.argv) if '--debounce' in sys.argv else DEV_DEBOUNCE_SECONDS
+
+    mimetypes.add_type('text/javascript', '.js')
+    STATE.is_prod = '--production' in sys.argv
+    STATE.render()
+
+    threading.Thread(target=watch_loop, args=(debounce,), daemon=True).start()
+
+    server = ThreadingHTTPServer((HOST, port), DevRequestHandler)
+    server.daemon_threads = True
+    print(f"🚀 Dev server running at http://{HOST}:{port}/ (live reload on, debounce {debounce * 1000:.0f} ms)")
+    print("(Press Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping dev server.")
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,578 @@
+import os
+import re
+import glob
+import json
+import shutil
+import hashlib
+import posixpath
+from html.parser import HTMLParser
+
+from assets import ASSET_DIRS, FINGERPRINTED_RE, minify_css, is_external, split_url
+import critical_css
+from critical_css import HREF_RE, above_the_fold, parse_css, split_selector_list
+from gallery_format import GALLERY_PAGES_DIR  # Prerendered gallery pages are scanned too
+
+# Configuration
+# The hand-written @font-face files; replaced by the generated subset CSS when fontTools is installed
+FONT_STYLESHEETS = [
+    '/fonts/blackgold-cufonfonts-webfont/style.css',
+    '/fonts/poppins-cufonfonts-webfont/style.css',
+]
+
+POPPINS_DIR = 'fonts/poppins-cufonfonts-webfont'
+POPPINS_WEIGHTS = {100: 'Thin', 200: 'ExtraLight', 300: 'Light', 400: 'Regular', 500: 'Medium',
+                   600: 'SemiBold', 700: 'Bold', 800: 'ExtraBold', 900: 'Black'}
+
+def poppins_faces():
+    faces = {}
+    for weight, name in POPPINS_WEIGHTS.items():
+        faces[(weight, 'normal')] = f"{POPPINS_DIR}/Poppins-{name}.woff"
+        faces[(weight, 'italic')] = f"{POPPINS_DIR}/Poppins-{'' if weight == 400 else name}Italic.woff"
+    return faces
+
+# Families the stylesheets ask for (var(--ff-primary), var(--ff-secondary)) -> {(weight, style): source file}.
+# The per-weight names of FONT_STYLESHEETS ('Poppins Bold', ...) are read from those files.
+FONT_FAMILIES = {
+    "Poppins": poppins_faces(),
+    "BlackGold": {(400, 'normal'): 'fonts/blackgold-cufonfonts-webfont/BlackGold_Personal_use.woff'},
+}
+
+SUBSET_DIR = 'fonts/subset'
+# fonts.<content hash>.css: already fingerprinted, so the asset stage does not depend on the font subsets
+SUBSET_CSS = 'fonts.{hash}.css'
+CACHE_DIR = '.build/cache/fonts'  # <hash of source font + glyph set>.woff2
+SUBSET_VERSION = 2  # Bump when the subsetter options change
+FONTS_COMPONENT = 'fonts.html'  # What render_component() renders (see build_site.GENERATED_COMPONENTS)
+STATE_FILE = '.build/cache/font_subset.json'  # Input hash and markup of the last run
+
+# Text rendered by scripts (gallery titles, form messages...) never shows up in the static pages,
+# so every subset keeps printable ASCII and common punctuation
+BASE_TEXT = ''.join(chr(c) for c in range(0x20, 0x7f)) + ' ©–—‘’“”•…'
+
+# Faces used above the fold on the most pages get a <link rel="preload">
+MAX_PRELOADS = 2
+
+# Default browser styles that matter for fonts
+UA_BOLD_TAGS = {'b', 'strong', 'th', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+UA_ITALIC_TAGS = {'i', 'em', 'cite', 'var', 'dfn', 'address'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+HIDDEN_TEXT_TAGS = {'script', 'style', 'noscript', 'template', 'title'}
+
+# Rules that only apply while interacting are evaluated in a second pass, so both states count
+STATE_PSEUDO_RE = re.compile(r':(hover|focus|focus-within|focus-visible|active|visited|checked)\b')
+PSEUDO_ELEMENT_RE = re.compile(r'::[\w-]+|:(before|after|first-line|first-letter|placeholder)\b')
+
+FONT_PROPERTIES = ('font-family', 'font-weight', 'font-style')
+FONT_WEIGHT_KEYWORDS = {'normal': 400, 'bold': 700}
+
+STYLESHEET_RE = re.compile(r'<link\b[^>]*\brel=["\']stylesheet["\'][^>]*>|<style\b[^>]*>(.*?)</style>', re.I | re.S)
+MEDIA_RE = re.compile(r'\bmedia=(["\'])([^"\']+)\1', re.I)
+
+# --- CSS ---
+
+def parse_declarations(body):
+    declarations = {}
+    for declaration in body.split(';'):
+        name, _, value = declaration.partition(':')
+        if value:
+            declarations[name.strip().lower()] = value.replace('!important', '').strip()
+    return declarations
+
+def resolve_vars(value, custom_properties, depth=0):
+    """
+    Replaces var(--name, fallback) with the value of the custom property (defined anywhere in the CSS).
+    """
+    def replace(match):
+        name, _, fallback = match.group(1).partition(',')
+        return custom_properties.get(name.strip(), fallback.strip())
+    resolved = re.sub(r'var\(\s*([^()]*)\)', replace, value)
+    if 'var(' in resolved and depth < 5:
+        return resolve_vars(resolved, custom_properties, depth + 1)
+    return resolved
+
+def specificity(selector):
+    simplified = re.sub(r'\([^)]*\)', '', selector)
+    ids = len(re.findall(r'#[\w-]+', simplified))
+    classes = len(re.findall(r'\.[\w-]+|\[[^\]]*\]|:[\w-]+', simplified))
+    tags = len(re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', simplified))
+    return ids, classes, tags
+
+def parse_compound(compound):
+    """
+    Returns (tag, classes, ids, attributes) of a compound selector like 'a.nav__link[href]'.
+    Pseudo-classes are dropped, so the rule counts wherever it could apply.
+    """
+    compound = re.sub(r':[\w-]+(\([^)]*\))?', '', compound)
+    attributes = {name.lower() for name in re.findall(r'\[\s*([\w-]+)', compound)}
+    compound = re.sub(r'\[[^\]]*\]', '', compound)
+    tag = re.match(r'[a-zA-Z][\w-]*', compound)
+    return (tag.group(0).lower() if tag else None, set(re.findall(r'\.([\w-]+)', compound)),
+            set(re.findall(r'#([\w-]+)', compound)), attributes)
+
+def compile_selector(selector):
+    """
+    Splits a complex selector into [(compound, combinator to the compound on its left)], rightmost first.
+    """
+    compounds, combinator = [], None
+    for token in re.split(r'\s*([>+~])\s*|\s+', selector.strip()):
+        if not token:
+            continue
+        if token in '>+~':
+            combinator = token
+            continue
+        compounds.append((parse_compound(token), combinator))
+        combinator = ' '
+    return compounds[::-1]
+
+def compound_matches(compound, element):
+    tag, classes, ids, attributes = compound
+    return ((tag is None or tag == element['tag']) and classes <= element['classes']
+            and ids <= element['ids'] and attributes <= element['attributes'])
+
+def selector_matches(parts, stack, i=0, position=None):
+    """
+    True if the compiled selector matches the element at stack[position] (the innermost by default).
+    Sibling combinators are not tracked: the sibling compound is assumed to match.
+    """
+    if position is None:
+        position = len(stack) - 1
+    compound, combinator = parts[i]
+    if not compound_matches(compound, stack[position]):
+        return False
+    if i + 1 == len(parts):
+        return True
+    if combinator in ('+', '~'):
+        # Skip the sibling and keep matching from the same parent
+        return i + 2 == len(parts) or any(selector_matches(parts, stack, i + 2, p) for p in range(position - 1, -1, -1))
+    if combinator == '>':
+        return position > 0 and selector_matches(parts, stack, i + 1, position - 1)
+    return any(selector_matches(parts, stack, i + 1, p) for p in range(position - 1, -1, -1))
+
+def collect_rules(nodes, rules, custom_properties, media=None):
+    """
+    Appends (media, compiled selector, specificity, order, font declarations) for every rule setting a font property.
+    """
+    for node in nodes:
+        if node[0] == 'rule':
+            _, selector_list, body = node
+            declarations = parse_declarations(body)
+            for name, value in declarations.items():
+                if name.startswith('--'):
+                    custom_properties[name] = value
+            fonts = {name: declarations[name] for name in FONT_PROPERTIES if name in declarations}
+            if not fonts:
+                continue
+            for selector in split_selector_list(selector_list):
+                if PSEUDO_ELEMENT_RE.search(selector):
+                    continue
+                rules.append({"media": media, "state": bool(STATE_PSEUDO_RE.search(selector)),
+                              "parts": compile_selector(selector), "specificity": specificity(selector),
+                              "order": len(rules), "fonts": fonts})
+        elif node[0] == 'block' and isinstance(node[2], list):
+            prelude = node[1] if media is None else f"{media} and {node[1]}"
+            collect_rules(node[2], rules, custom_properties, prelude)
+
+def page_stylesheets(html_content, root='.'):
+    """
+    Returns the page's local stylesheets and <style> blocks in document order as (media, css).
+    """
+    sheets = []
+    for match in STYLESHEET_RE.finditer(html_content):
+        if match.group(0).lower().startswith('<style'):
+            sheets.append((None, match.group(1)))
+            continue
+        href = HREF_RE.search(match.group(0))
+        if not href or is_external(href.group(2)):
+            continue
+        path, _ = split_url(href.group(2))
+        disk_path = os.path.join(root, *path.lstrip('/').split('/'))
+        if path in FONT_STYLESHEETS or path.startswith(f"/{SUBSET_DIR}/") or not os.path.isfile(disk_path):
+            continue
+        media = MEDIA_RE.search(match.group(0))
+        media = media.group(2).strip() if media and media.group(2).strip() not in ('all', 'screen') else None
+        with open(disk_path, 'r', encoding='utf-8') as f:
+            sheets.append((media, f.read()))
+    return sheets
+
+# --- FACES ---
+
+def stylesheet_faces(root='.'):
+    """
+    Reads the @font-face rules of FONT_STYLESHEETS: {family: {(weight, style): source file}}.
+    """
+    families = {}
+    for url in FONT_STYLESHEETS:
+        disk_path = os.path.join(root, *url.lstrip('/').split('/'))
+        if not os.path.isfile(disk_path):
+            continue
+        with open(disk_path, 'r', encoding='utf-8') as f:
+            nodes = parse_css(minify_css(f.read()))
+        for node in nodes:
+            if node[0] != 'block' or not node[1].startswith('@font-face'):
+                continue
+            declarations = parse_declarations(node[2])
+            source = re.search(r'url\((["\']?)([^"\')]+)\1\)', declarations.get('src', ''))
+            if not source or 'font-family' not in declarations:
+                continue
+            family = declarations['font-family'].strip('\'" ')
+            weight = parse_weight(declarations.get('font-weight', 'normal'), 400)
+            style = 'italic' if declarations.get('font-style', 'normal') in ('italic', 'oblique') else 'normal'
+            families.setdefault(family, {})[(weight, style)] = posixpath.join(posixpath.dirname(url.lstrip('/')), source.group(2))
+    return families
+
+def parse_weight(value, parent_weight):
+    value = value.strip().lower()
+    if value in FONT_WEIGHT_KEYWORDS:
+        return FONT_WEIGHT_KEYWORDS[value]
+    if value == 'bolder':
+        return 400 if parent_weight < 350 else 700 if parent_weight < 550 else 900
+    if value == 'lighter':
+        return 100 if parent_weight < 550 else 400 if parent_weight < 750 else 700
+    try:
+        return int(float(value))
+    except ValueError:
+        return parent_weight
+
+def match_face(families, family_list, weight, style):
+    """
+    Picks the declared face a browser would use: the first listed family that is a web font,
+    then the closest available weight (preferring the requested style).
+    Returns (family, weight, style) or None if the text falls back to a system font.
+    """
+    for name in family_list.split(','):
+        name = name.strip().strip('\'"')
+        family = next((f for f in families if f.lower() == name.lower()), None)
+        if family is None:
+            continue
+        faces = families[family]
+        candidates = [key for key in faces if key[1] == style] or list(faces)
+        # Lighter weights are preferred up to 500, heavier ones above (simplified CSS font matching)
+        best = min(candidates, key=lambda key: (abs(key[0] - weight), key[0] > weight if weight <= 500 else key[0] < weight))
+        return family, best[0], best[1]
+    return None
+
+# --- MARKUP ---
+
+class FontUsageCollector(HTMLParser):
+    """
+    Walks a page with a stack of open elements, resolves font-family/weight/style for every text run
+    through the collected rules, and records the characters per face: {(family, weight, style): set(chars)}.
+    """
+
+    def __init__(self, rules, custom_properties, families):
+        super().__init__(convert_charrefs=True)
+        self.rules, self.custom_properties, self.families = rules, custom_properties, families
+        self.stack, self.styles = [], [{"font-family": "serif", "font-weight": 400, "font-style": "normal"}]
+        self.usage = {}
+
+    def computed_style(self, element, inline_style):
+        parent = self.styles[-1]
+        winners = {}
+        for rule in self.rules:
+            if selector_matches(rule['parts'], self.stack):
+                rank = (rule['specificity'], rule['order'])
+                for name, value in rule['fonts'].items():
+                    if name not in winners or rank >= winners[name][0]:
+                        winners[name] = (rank, value)
+        values = {name: value for name, (_, value) in winners.items()}
+        values.update({name: value for name, value in parse_declarations(inline_style).items() if name in FONT_PROPERTIES})
+
+        style = dict(parent)
+        if element['tag'] in UA_BOLD_TAGS:
+            style['font-weight'] = parse_weight('bolder', parent['font-weight'])
+        if element['tag'] in UA_ITALIC_TAGS:
+            style['font-style'] = 'italic'
+        for name, value in values.items():
+            value = resolve_vars(value, self.custom_properties)
+            if value in ('inherit', 'unset', 'initial', 'revert'):
+                continue
+            if name == 'font-weight':
+                style[name] = parse_weight(value, parent['font-weight'])
+            elif name == 'font-style':
+                style[name] = 'italic' if value.startswith(('italic', 'oblique')) else 'normal'
+            else:
+                style[name] = value
+        return style
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        attributes = dict(attrs)
+        element = {"tag": tag, "classes": set((attributes.get('class') or '').split()),
+                   "ids": {attributes['id']} if attributes.get('id') else set(),
+                   "attributes": {name.lower() for name in attributes}}
+        self.stack.append(element)
+        self.styles.append(self.computed_style(element, attributes.get('style') or ''))
+
+        # Text typed into form fields is drawn with their font as well
+        visible_attribute = attributes.get('placeholder') or (attributes.get('value') if tag in ('input', 'button') else None)
+        if visible_attribute:
+            self.record(visible_attribute)
+
+        if tag in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        # Pop up to the matching element; stray end tags are ignored
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i]['tag'] == tag:
+                del self.stack[i:]
+                del self.styles[i + 1:]
+                return
+
+    def handle_data(self, data):
+        if any(element['tag'] in HIDDEN_TEXT_TAGS for element in self.stack):
+            return
+        self.record(data)
+
+    def record(self, text):
+        chars = {c for c in text if not c.isspace()}
+        if not chars:
+            return
+        style = self.styles[-1]
+        face = match_face(self.families, style['font-family'], style['font-weight'], style['font-style'])
+        if face:
+            self.usage.setdefault(face, set()).update(chars)
+
+def font_usage(html_content, families, root='.'):
+    """
+    Returns ({face: chars} for the whole page, set of faces used above the fold).
+    Every media query and interaction state is evaluated on its own pass, so all of them count.
+    """
+    rules, custom_properties = [], {}
+    for media, css in page_stylesheets(html_content, root):
+        collect_rules(parse_css(minify_css(css)), rules, custom_properties, media)
+
+    scenarios = [(None, False), (None, True)]
+    for media in dict.fromkeys(rule['media'] for rule in rules if rule['media']):
+        scenarios += [(media, False), (media, True)]
+
+    usage, fold_faces = {}, set()
+    for media, state in scenarios:
+        active = [rule for rule in rules if rule['media'] in (None, media) and (state or not rule['state'])]
+        for fragment, target in ((html_content, usage), (above_the_fold(html_content), None)):
+            collector = FontUsageCollector(active, custom_properties, families)
+            collector.feed(fragment)
+            collector.close()
+            if target is None:
+                fold_faces.update(collector.usage)
+            else:
+                for face, chars in collector.usage.items():
+                    target.setdefault(face, set()).update(chars)
+    return usage, fold_faces
+
+def rendered_pages():
+    """
+    Yields the HTML of every page as build_site renders it, plus the prerendered gallery pages on disk.
+    """
+    import build_site
+
+    # Read directly: a generated component may not exist yet on the first build
+    components = {}
+    for placeholder, filename in build_site.COMPONENTS.items():
+        path = build_site.component_path(filename)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                components[placeholder] = f.read()
+    for template_name in build_site.PAGES:
+        template_path = os.path.join(build_site.TEMPLATES_DIR, template_name)
+        if os.path.exists(template_path):
+            with open(template_path, 'r', encoding='utf-8') as f:
+                yield build_site.render_template(f.read(), components)
+    for path in sorted(glob.glob(os.path.join(GALLERY_PAGES_DIR, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield f.read()
+
+# --- SUBSETTING ---
+
+def unicode_range(chars):
+    codepoints = sorted({ord(c) for c in chars})
+    ranges, start = [], None
+    for i, codepoint in enumerate(codepoints):
+        if start is None:
+            start = codepoint
+        if i + 1 == len(codepoints) or codepoints[i + 1] != codepoint + 1:
+            ranges.append(f"U+{start:X}" if start == codepoint else f"U+{start:X}-{codepoint:X}")
+            start = None
+    return ', '.join(ranges)
+
+def subset_font(source, text):
+    """
+    Subsets one font file to the glyphs of `text` and converts it to WOFF2.
+    Results are cached in CACHE_DIR by the hash of the source font and the glyph set.
+    Returns the path of the cached .woff2.
+    """
+    h = hashlib.sha1(f"{SUBSET_VERSION}:{''.join(sorted(set(text)))}".encode('utf-8'))
+    with open(source, 'rb') as f:
+        h.update(f.read())
+    cached = os.path.join(CACHE_DIR, f"{h.hexdigest()}.woff2")
+    if os.path.exists(cached):
+        return cached
+
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.desubroutinize = True  # Compresses better
+    options.drop_tables += ['meta']
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    subset.save_font(font, cached + '.tmp', options)
+    os.replace(cached + '.tmp', cached)
+    print(f"  [✓] Subset {os.path.basename(source)} to {len(set(text))} glyphs ({os.path.getsize(source)} -> {os.path.getsize(cached)} bytes)")
+    return cached
+
+def build_font_subsets(pages, root='.'):
+    """
+    Scans the pages, subsets every face they use and writes SUBSET_DIR (the .woff2 files plus SUBSET_CSS).
+    Returns (URLs of the faces to preload, most used above the fold first, URL of the stylesheet).
+    """
+    families = {**stylesheet_faces(root), **FONT_FAMILIES}
+
+    usage, fold_counts = {}, {}
+    for html_content in pages:
+        page_usage, fold_faces = font_usage(html_content, families, root)
+        for face, chars in page_usage.items():
+            usage.setdefault(face, set()).update(chars)
+        for face in fold_faces:
+            fold_counts[face] = fold_counts.get(face, 0) + 1
+
+    # Every declared face gets an @font-face, used by the static pages or not: text that scripts insert
+    # (index cards, gallery captions) must not end up with faux bold or missing glyphs. Browsers only
+    # download the faces a page actually renders. Faces sharing a source file (e.g. 'Poppins Bold'
+    # and Poppins 700) share one subset.
+    faces, glyphs_by_source = [], {}
+    for family, family_faces in families.items():
+        for (weight, style), font_file in family_faces.items():
+            source = os.path.join(root, font_file)
+            if not os.path.isfile(source):
+                if (family, weight, style) in usage:
+                    print(f"  ! Warning: Font file {source} not found, {family} {weight} {style} left out.")
+                continue
+            faces.append((family, weight, style, source))
+            glyphs = glyphs_by_source.setdefault(source, set(BASE_TEXT))
+            glyphs.update(usage.get((family, weight, style), ()))
+
+    output_dir = os.path.join(root, SUBSET_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    urls, kept = {}, set()
+    for source, glyphs in glyphs_by_source.items():
+        cached = subset_font(source, ''.join(sorted(glyphs)))
+        stem = os.path.splitext(os.path.basename(source))[0]
+        filename = f"{stem}.{os.path.basename(cached)[:8]}.woff2"
+        if not os.path.exists(os.path.join(output_dir, filename)):
+            shutil.copyfile(cached, os.path.join(output_dir, filename))
+        urls[source] = f"/{SUBSET_DIR}/{filename}"
+        kept.add(filename)
+
+    rules = []
+    for family, weight, style, source in sorted(faces):
+        rules.append(f"@font-face {{\n"
+                     f"    font-family: '{family}';\n"
+                     f"    font-style: {style};\n"
+                     f"    font-weight: {weight};\n"
+                     f"    font-display: swap;\n"
+                     f"    src: url('{posixpath.basename(urls[source])}') format('woff2');\n"
+                     f"    unicode-range: {unicode_range(glyphs_by_source[source])};\n"
+                     f"}}")
+    css = f"/* Generated by tools/font_subset.py from {', '.join(FONT_STYLESHEETS)} */\n\n" + '\n\n'.join(rules) + '\n'
+    css_filename = SUBSET_CSS.format(hash=hashlib.sha256(css.encode('utf-8')).hexdigest()[:8])
+    if not os.path.exists(os.path.join(output_dir, css_filename)):
+        with open(os.path.join(output_dir, css_filename), 'w', encoding='utf-8') as f:
+            f.write(css)
+    kept.add(css_filename)
+
+    # Subsets for an old glyph set are not referenced anymore
+    for filename in os.listdir(output_dir):
+        if filename not in kept:
+            os.remove(os.path.join(output_dir, filename))
+
+    print(f"  [✓] {len(rules)} font face(s), {len(usage)} used by the pages, {len(glyphs_by_source)} subset file(s)")
+
+    preload_faces = sorted(fold_counts, key=lambda face: (-fold_counts[face], face))
+    preloads = []
+    for family, weight, style in preload_faces:
+        url = urls.get(os.path.join(root, families[family][(weight, style)]))
+        if url and url not in preloads:
+            preloads.append(url)
+    return preloads[:MAX_PRELOADS], f"/{SUBSET_DIR}/{css_filename}"
+
+def inputs_key(root='.'):
+    """
+    Hash of everything the subsets are computed from: the templates and components (but not
+    FONTS_COMPONENT itself), the prerendered gallery pages, the stylesheets, the fonts and the scripts.
+    Fonts are hashed by size and mtime, the small text files by content.
+    """
+    import build_site
+
+    h = hashlib.sha1(f"{SUBSET_VERSION}:{MAX_PRELOADS}:{BASE_TEXT}".encode('utf-8'))
+    text_files = [build_site.component_path(filename) for filename in build_site.COMPONENTS.values() if filename != FONTS_COMPONENT]
+    text_files += [os.path.join(build_site.TEMPLATES_DIR, template_name) for template_name in build_site.PAGES]
+    text_files += sorted(glob.glob(os.path.join(root, GALLERY_PAGES_DIR, '*.html')))
+    text_files += [os.path.abspath(__file__), critical_css.__file__]
+    font_files = []
+    for directory in ASSET_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, directory)):
+            dirnames[:] = sorted(d for d in dirnames if os.path.join(dirpath, d) != os.path.join(root, SUBSET_DIR))
+            for filename in sorted(filenames):
+                if filename.endswith('.css') and not FINGERPRINTED_RE.search(filename):
+                    text_files.append(os.path.join(dirpath, filename))
+                elif filename.endswith(('.woff', '.woff2', '.ttf', '.otf')):
+                    font_files.append(os.path.join(dirpath, filename))
+
+    for path in text_files:
+        h.update(path.encode('utf-8'))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(hashlib.sha1(f.read()).digest())
+    for path in font_files:
+        stat = os.stat(path)
+        h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+    return h.hexdigest()
+
+def full_fonts_markup():
+    # The hand-written stylesheets with every face, used without fontTools and by the dev server
+    return '\n'.join(f'<link rel="stylesheet" href="{url}"/>' for url in FONT_STYLESHEETS)
+
+def render_component():
+    """
+    Returns the font links for <head>: preloads for the critical faces plus the subset stylesheet.
+    The pages are only re-rendered and scanned when inputs_key() differs from the last run
+    (or a subset file is gone). Falls back to the full FONT_STYLESHEETS when fontTools is not installed.
+    """
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        print("  ! Warning: fontTools is not installed, serving the full fonts (pip install fonttools brotli).")
+        return full_fonts_markup()
+
+    key = inputs_key()
+    cached = None
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except Exception:
+            cached = None
+    if cached and cached.get('key') == key and all(
+            os.path.exists(os.path.join(SUBSET_DIR, filename)) for filename in cached['files']):
+        return cached['markup']
+
+    try:
+        preloads, css_url = build_font_subsets(rendered_pages())
+    except Exception as e:
+        print(f"  ! Warning: Font subsetting failed ({e}), serving the full fonts.")
+        return full_fonts_markup()
+
+    lines = [f'<link rel="preload" href="{url}" as="font" type="font/woff2" crossorigin>' for url in preloads]
+    lines.append(f'<link rel="stylesheet" href="{css_url}"/>')
+    markup = '\n'.join(lines)
+
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"key": key, "markup": markup, "files": sorted(os.listdir(SUBSET_DIR))}, f)
+    return markup
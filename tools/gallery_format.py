@@ -0,0 +1,186 @@
+import os
+import json
+import shutil
+import posixpath
+
+# Configuration
+GALLERY_FORMATS = ('json', 'compact')
+COMPACT_FORMAT = 'columnar'
+COMPACT_VERSION = 1
+
+# Prerendered gallery pages (see gallery_pages.py) live in this folder as <id>.html.
+# Not 'gallery': GitHub Pages would serve that folder for /gallery, the clean URL of gallery.html.
+GALLERY_PAGES_DIR = 'galleries'
+
+# Combined home page index (written with --format compact)
+INDEX_DIR = 'data/gallery_index'
+INDEX_FILE = 'index.json'
+# Whole categories are grouped into shards of at least this many galleries.
+# The first shard is inlined in INDEX_FILE, so the top of the page needs a single request.
+INDEX_SHARD_SIZE = 24
+
+# Thumbnail column codes (anything else is stored as the path itself)
+THUMB_SAME_AS_SRC = 0
+THUMB_SIBLING = 1  # <name>_thumb<ext> next to the source
+
+# --- GALLERIES ---
+
+def common_folder(paths):
+    """
+    Returns the longest shared 'folder/' prefix of the paths ('' if there is none).
+    """
+    prefix = posixpath.commonprefix(paths) if paths else ''
+    return prefix[:prefix.rfind('/') + 1]
+
+def sibling_thumb(src):
+    stem, ext = posixpath.splitext(src)
+    return f"{stem}_thumb{ext}"
+
+def compact_section(section):
+    """
+    Turns a section's list of image objects into parallel arrays:
+    src paths share one prefix, thumbnails are coded, renditions become rows.
+    """
+    images = section['images']
+    compact = {key: value for key, value in section.items() if key != 'images'}
+    prefix = common_folder([img['src'] for img in images])
+
+    compact['prefix'] = prefix
+    compact['src'] = [img['src'][len(prefix):] for img in images]
+
+    thumbs = []
+    for img in images:
+        if img['thumb'] == img['src']:
+            thumbs.append(THUMB_SAME_AS_SRC)
+        elif img['thumb'] == sibling_thumb(img['src']):
+            thumbs.append(THUMB_SIBLING)
+        else:
+            thumbs.append(img['thumb'])
+    compact['thumb'] = thumbs
+
+    # Every other image field becomes a column (None where an image lacks it)
+    columns = []
+    for img in images:
+        for key in img:
+            if key not in ('src', 'thumb', 'renditions') and key not in columns:
+                columns.append(key)
+    for key in columns:
+        compact[key] = [img.get(key) for img in images]
+
+    if any('renditions' in img for img in images):
+        rendition_srcs = [r['src'] for img in images for r in img.get('renditions', [])]
+        rendition_prefix = common_folder(rendition_srcs)
+        types = sorted({r['type'] for img in images for r in img.get('renditions', [])})
+        compact['rendition_prefix'] = rendition_prefix
+        compact['rendition_types'] = types
+        compact['renditions'] = [
+            [[r['src'][len(rendition_prefix):], r['width'], r['height'], types.index(r['type']), r['bytes']]
+             for r in img.get('renditions', [])]
+            for img in images
+        ]
+    return compact
+
+def expand_section(compact):
+    prefix = compact['prefix']
+    skip = {'prefix', 'src', 'thumb', 'renditions', 'rendition_prefix', 'rendition_types'}
+    columns = [key for key, value in compact.items() if key not in skip and isinstance(value, list)]
+    section = {key: value for key, value in compact.items() if key not in skip and key not in columns}
+
+    images = []
+    for i, name in enumerate(compact['src']):
+        src = prefix + name
+        thumb = compact['thumb'][i]
+        img = {
+            "src": src,
+            "thumb": src if thumb == THUMB_SAME_AS_SRC else sibling_thumb(src) if thumb == THUMB_SIBLING else thumb,
+        }
+        for key in columns:
+            if compact[key][i] is not None:
+                img[key] = compact[key][i]
+        if 'renditions' in compact:
+            img['renditions'] = [
+                {"src": compact['rendition_prefix'] + file, "width": width, "height": height,
+                 "type": compact['rendition_types'][type_index], "bytes": size}
+                for file, width, height, type_index, size in compact['renditions'][i]
+            ]
+        images.append(img)
+    section['images'] = images
+    return section
+
+def compact_gallery(gallery):
+    compact = {"format": COMPACT_FORMAT, "version": COMPACT_VERSION}
+    compact.update({key: value for key, value in gallery.items() if key != 'sections'})
+    compact['sections'] = [compact_section(section) for section in gallery.get('sections', [])]
+    return compact
+
+def expand_gallery(data):
+    """
+    Returns the regular gallery object for either format.
+    """
+    if data.get('format') != COMPACT_FORMAT:
+        return data
+    gallery = {key: value for key, value in data.items() if key not in ('format', 'version', 'sections')}
+    gallery['sections'] = [expand_section(section) for section in data['sections']]
+    return gallery
+
+def dumps_gallery(gallery, output_format='json'):
+    """
+    Serializes a gallery: 'json' is the readable indented format, 'compact' the minified columnar one.
+    """
+    if output_format == 'compact':
+        return json.dumps(compact_gallery(gallery), separators=(',', ':'), ensure_ascii=False)
+    return json.dumps(gallery, indent=2)
+
+def load_gallery(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return expand_gallery(json.load(f))
+
+# --- HOME PAGE INDEX ---
+
+def index_shard(categories, entries_by_category):
+    """
+    One shard: the category names plus columnar gallery entries (category = index into the names).
+    'url' is the gallery's link (the prerendered page with --static-pages).
+    """
+    shard = {"categories": categories, "category": [], "id": [], "title": [], "location": [], "url": [], "thumb": []}
+    for category_index, category in enumerate(categories):
+        for entry in entries_by_category[category]:
+            shard['category'].append(category_index)
+            for key in ('id', 'title', 'location', 'url', 'thumb'):
+                shard[key].append(entry[key])
+    return shard
+
+def write_gallery_index(ordered_categories, entries_by_category):
+    """
+    Writes INDEX_DIR/INDEX_FILE with the first shard inline and the URLs of the other shards,
+    which hold the following categories in page order.
+    """
+    shutil.rmtree(INDEX_DIR, ignore_errors=True)
+    os.makedirs(INDEX_DIR, exist_ok=True)
+
+    groups, current, count = [], [], 0
+    for category in ordered_categories:
+        current.append(category)
+        count += len(entries_by_category[category])
+        if count >= INDEX_SHARD_SIZE:
+            groups.append(current)
+            current, count = [], 0
+    if current or not groups:
+        groups.append(current)
+
+    shard_urls = []
+    for number, categories in enumerate(groups[1:], start=1):
+        with open(os.path.join(INDEX_DIR, f"{number}.json"), 'w', encoding='utf-8') as f:
+            json.dump(index_shard(categories, entries_by_category), f, separators=(',', ':'), ensure_ascii=False)
+        shard_urls.append(f"/{INDEX_DIR}/{number}.json")
+
+    index = {"version": COMPACT_VERSION, "shards": shard_urls, **index_shard(groups[0], entries_by_category)}
+    with open(os.path.join(INDEX_DIR, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+
+    print(f"  Wrote gallery index ({sum(len(e) for e in entries_by_category.values())} galleries, {len(groups)} shard(s))")
+
+def remove_gallery_index():
+    # A run in the regular format must not leave a stale compact index behind
+    if os.path.isdir(INDEX_DIR):
+        shutil.rmtree(INDEX_DIR)
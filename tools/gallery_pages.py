@@ -0,0 +1,209 @@
+import os
+import re
+import sys
+import html
+
+import build_site
+from assets import load_manifest
+from critical_css import write_report as write_critical_css_report
+from gallery_format import load_gallery
+from generate_galleries import DATA_DIR, IMAGES_DIR, GALLERY_PAGES_DIR
+from image_probe import get_image_size
+from placeholders import placeholder_style
+from profiler import span
+
+# Configuration
+GALLERY_TEMPLATE = 'gallery_template.html'  # Output: GALLERY_PAGES_DIR/<id>.html
+
+# Base URL of the gallery folders (src/thumb/renditions in the JSON are relative to it).
+# Point this at the storage bucket to serve the prerendered pages from there instead.
+IMAGES_URL = '/images'
+
+# The first few thumbnails are in the first viewport: load those right away
+EAGER_IMAGE_COUNT = 3
+
+SITE_NAME = 'Vadim Maltsev'
+
+YOUTUBE_ID_RE = re.compile(r'^.*(youtu\.be/|v/|u/\w/|embed/|watch\?v=|&v=)([^#&?]*).*')
+
+def youtube_id(url):
+    # Same rules as getYouTubeID() in gallery-view.js
+    match = YOUTUBE_ID_RE.match(url)
+    return match.group(2) if match and len(match.group(2)) == 11 else None
+
+def sort_by_order(items):
+    # Galleries synced from Supabase carry sort_order; the scanner's order is kept otherwise
+    return sorted(items, key=lambda item: item.get('sort_order') or 0)
+
+def thumb_size(img, folder_url_path, folder_disk_path):
+    """
+    Returns the pixel size of the file used as the thumbnail, so the width/height
+    attributes match what the browser would lay out without them.
+    """
+    if img['thumb'] == img['src']:
+        return img['width'], img['height']
+    for rendition in img.get('renditions', []):
+        if rendition['src'] == img['thumb']:
+            return rendition['width'], rendition['height']
+    try:
+        return get_image_size(os.path.join(folder_disk_path, *img['thumb'].split('/')))
+    except Exception:
+        print(f"    ! Warning: Could not read thumbnail size of {folder_url_path}/{img['thumb']}")
+        return None
+
+def render_image(img, folder, index):
+    """
+    One lightbox item, with the same markup gallery-view.js produces plus
+    intrinsic size, lazy loading and a srcset of the responsive renditions.
+    """
+    folder_url = f"{IMAGES_URL}/{folder}"
+    alt = html.escape(img.get('alt') or '')
+    size = thumb_size(img, folder_url, os.path.join(IMAGES_DIR, folder))
+
+    thumb_url = html.escape(f"{folder_url}/{img['thumb']}")
+    full_url = html.escape(f"{folder_url}/{img['src']}")
+
+    attributes = ['class="portfolio__img example-image"', f'src="{thumb_url}"', f'alt="{alt}"']
+    if size:
+        attributes.append(f'width="{size[0]}" height="{size[1]}"')
+    style = placeholder_style(img)
+    if style:
+        attributes.append(f'style="{style}"')
+    if index < EAGER_IMAGE_COUNT:
+        attributes.append('fetchpriority="high"' if index == 0 else 'loading="eager"')
+    else:
+        attributes.append('loading="lazy" decoding="async"')
+    img_tag = f"<img {' '.join(attributes)}>"
+
+    # <picture> offers every rendition format; the browser picks the best size for the rendered width
+    sources = {}
+    for rendition in img.get('renditions', []):
+        sources.setdefault(rendition['type'], []).append(f"{folder_url}/{rendition['src']} {rendition['width']}w")
+    if sources and size:
+        source_tags = ''.join(
+            f'<source type="{mime}" srcset="{html.escape(", ".join(srcset))}" sizes="{size[0]}px">'
+            for mime, srcset in sorted(sources.items())  # image/avif before image/webp
+        )
+        img_tag = f"<picture>{source_tags}{img_tag}</picture>"
+
+    return (f'<a class="portfolio__item" href="{full_url}" '
+            f'data-pswp-width="{img["width"]}" data-pswp-height="{img["height"]}" target="_blank">'
+            f'{img_tag}<p class="portfolio__item_alt">{alt}</p></a>')
+
+def render_sections(gallery, indentation):
+    lines = []
+    index = 0
+    for number, section in enumerate(sort_by_order(gallery.get('sections', []))):
+        if section.get('title'):
+            lines.append(f'<h3 class="section__subtitle--gallery">{html.escape(section["title"])}</h3>')
+        folder = section.get('folder') or gallery['folder']
+        lines.append(f'<div class="portfolio pswp-gallery" id="gallery-section-{number}">')
+        for img in sort_by_order(section.get('images', [])):
+            lines.append(f'    {render_image(img, folder, index)}')
+            index += 1
+        lines.append('</div>')
+    return f'\n{indentation}'.join(lines)
+
+def render_video(gallery):
+    video = gallery.get('video')
+    if not video:
+        return None
+    video_id = youtube_id(video)
+    if video_id:
+        return (f'<iframe class="portfolio__video" src="https://www.youtube.com/embed/{video_id}?rel=0&controls=1&autoplay=1&mute=1&iv_load_policy=3&modestbranding=1" '
+                'title="YouTube video player" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" '
+                'referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>')
+    src = html.escape(f"{IMAGES_URL}/{gallery['folder']}/{video}")
+    return (f'<video class="portfolio__video" controls preload="metadata" oncontextmenu="return false;">'
+            f'<source id="gallery-video-source" src="{src}" type="video/mp4" />'
+            'Your browser does not support the video tag.</video>')
+
+def fill_template(template_html, gallery_id, gallery):
+    """
+    Puts the gallery's title, location, video and image grid into the gallery template.
+    The content root is marked data-prerendered, which tells gallery-view.js not to fetch.
+    """
+    title = html.escape(gallery.get('title') or 'Untitled Gallery')
+    location = html.escape(gallery.get('location') or '')
+
+    page = re.sub(r'<title>.*?</title>', lambda m: f'<title>{title} | {SITE_NAME}</title>', template_html, count=1)
+    page = re.sub(r'(<strong id="gallery-title">).*?(</strong>)', lambda m: f'{m.group(1)}{title}{m.group(2)}', page, count=1)
+    page = re.sub(r'(<h2 id="gallery-location"[^>]*>).*?(</h2>)', lambda m: f'{m.group(1)}{location}{m.group(2)}', page, count=1)
+
+    # The Supabase client is only needed to fetch, which a prerendered page never does
+    page = re.sub(r'[ \t]*<!-- Load in Supabase JS -->\n', '', page)
+    page = re.sub(r'[ \t]*<script src="[^"]*supabase-js[^"]*"></script>\n', '', page)
+
+    video = render_video(gallery)
+    if video:
+        page = re.sub(r'<div id="gallery-video-container" style="display: none;">.*?</video>\s*</div>',
+                      lambda m: f'<div id="gallery-video-container" style="display: block;">{video}</div>',
+                      page, count=1, flags=re.S)
+
+    root = re.search(r'^([ \t]*)<div id="gallery-content-root"></div>', page, flags=re.M)
+    if not root:
+        raise ValueError(f"{GALLERY_TEMPLATE} has no <div id=\"gallery-content-root\"></div>")
+    indentation = root.group(1)
+    attributes = f'id="gallery-content-root" data-prerendered="{html.escape(gallery_id)}"'
+    if gallery.get('pdf_file'):
+        attributes += f' data-pdf-file="{html.escape(gallery["pdf_file"])}"'
+    content = render_sections(gallery, indentation + '    ')
+    return (page[:root.start()]
+            + f'{indentation}<div {attributes}>\n{indentation}    {content}\n{indentation}</div>'
+            + page[root.end():])
+
+def build_gallery_pages(is_prod=False):
+    """
+    Renders GALLERY_PAGES_DIR/<id>.html for every data/galleries/<id>.json through the same
+    component/production pipeline as build_site.py. Pages of removed galleries are deleted.
+    Returns the number of pages written.
+    """
+    template_path = os.path.join(build_site.TEMPLATES_DIR, GALLERY_TEMPLATE)
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template_html = f.read()
+
+    loaded_components = build_site.load_all_components()
+    asset_manifest = load_manifest(build_site.OUTPUT_DIR) if is_prod else None
+    if is_prod and not asset_manifest:
+        print("  ! Warning: No asset manifest found, run build_site.py --production first for fingerprinted assets.")
+    critical_report = {}
+
+    output_dir = os.path.join(build_site.OUTPUT_DIR, GALLERY_PAGES_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    expected, written = set(), 0
+
+    for filename in sorted(os.listdir(DATA_DIR)):
+        if not filename.endswith('.json'):
+            continue
+        gallery_id = filename[:-len('.json')]
+        output_name = f"{GALLERY_PAGES_DIR}/{gallery_id}.html"
+
+        with span('gallery_page', 'page', page=output_name):
+            try:
+                gallery = load_gallery(os.path.join(DATA_DIR, filename))
+                page_html = fill_template(template_html, gallery_id, gallery)
+                page_html = build_site.render_page(page_html, loaded_components, output_name, is_prod, verbose=False,
+                                                   asset_manifest=asset_manifest, critical_report=critical_report)
+            except (ValueError, KeyError) as e:
+                print(f"  [!] Error building {output_name}: {e}")
+                continue
+
+            expected.add(f"{gallery_id}.html")
+            if build_site.write_if_changed(os.path.join(output_dir, f"{gallery_id}.html"), page_html):
+                written += 1
+                print(f"  Generated {output_name}")
+
+    for filename in os.listdir(output_dir):
+        if filename.endswith('.html') and filename not in expected:
+            os.remove(os.path.join(output_dir, filename))
+            print(f"  Removed {GALLERY_PAGES_DIR}/{filename} (gallery no longer exists)")
+
+    if critical_report:
+        write_critical_css_report(critical_report)
+
+    print(f"  [✓] {len(expected)} gallery page(s), {written} written to disk.")
+    return written
+
+if __name__ == "__main__":
+    # --production applies the same cleanup as build_site.py --production (run that first)
+    build_gallery_pages(is_prod='--production' in sys.argv)
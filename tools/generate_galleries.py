@@ -1,7 +1,19 @@
 import os
+import sys
 import json
 import re
-from PIL import Image
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from image_probe import get_image_size
+from scan_cache import ScanCache
+from derivatives import RENDITIONS_DIR, attach_renditions
+from placeholders import compute_placeholder, placeholder_style
+from cli_args import get_format_arg, get_jobs_arg
+from gallery_format import GALLERY_PAGES_DIR, dumps_gallery, write_gallery_index, remove_gallery_index
+from map_markers import marker_entry, write_map_markers
+from profiler import span
+import profiler
+import build_site
 
 # Configuration
 IMAGES_DIR = 'images'
@@ -9,8 +21,8 @@ DATA_DIR = 'data/galleries'
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
 METADATA_FILE = 'metadata.json'
 
-INDEX_TEMPLATE_FILE = "templates/index_template.html"
-INDEX_OUTPUT_FILE = "index.html"
+# Home page gallery grid, injected at <!-- PORTFOLIO --> by build_site.py
+PORTFOLIO_COMPONENT = "portfolio.html"
 
 # Define the order you want categories to appear on the home page.
 # Any category found that isn't in this list will be added at the end.
@@ -25,6 +37,13 @@ CATEGORY_ORDER = [
     "Products"
 ]
 
+# Worker pool used for per-image work inside get_images_from_folder (set by generate_site when jobs > 1)
+_image_pool = None
+
+# Compute LQIP placeholders + dominant colors while scanning (set by generate_site with lqip=True)
+_placeholders_enabled = False
+PLACEHOLDER_FIELDS = ('lqip', 'color')
+
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -52,13 +71,90 @@ def format_alt_text(text):
     # 4. Trim whitespace and capitalize first letter
     return text.strip()
 
-def get_images_from_folder(base_folder, subfolder_path, prefix):
+def scan_image(scan_path, filename, folder_files, rel_path_prefix, prefix, cache=None):
+    """
+    Reads dimensions and derives src/thumb/alt for a SINGLE image file.
+    Returns the image object, or None if the file is not a gallery image.
+    """
+    file_path = os.path.join(scan_path, filename)
+
+    if os.path.isdir(file_path):
+        return None  # Skip directories
+
+    ext = os.path.splitext(filename)[1].lower()
+    base_name = os.path.splitext(filename)[0]
+
+    # Skip non-images and thumbnails
+    if ext not in ALLOWED_EXTENSIONS or '_thumb' in base_name:
+        return None
+
+    try:
+        stat = os.stat(file_path)
+        entry = cache.lookup(file_path, stat) if cache else None
+
+        if entry is None:
+            # Get dimensions automatically (header-only, EXIF rotation applied)
+            with span('probe', 'image', file=filename):
+                width, height = get_image_size(file_path)
+        else:
+            width, height = entry['width'], entry['height']
+
+        # Check if a thumbnail exists
+        thumb_name = filename.replace(ext, f"_thumb{ext}")
+        has_thumb = thumb_name in folder_files
+
+        # Determine final Src/Thumb paths (Relative to Gallery Root)
+        final_src = f"{rel_path_prefix}{filename}"
+        final_thumb = f"{rel_path_prefix}{thumb_name}" if has_thumb else final_src
+
+        # Generate Alt Text (Strip prefix if present)
+        if prefix and base_name.startswith(prefix):
+            clean_name = base_name[len(prefix):]
+        else:
+            clean_name = base_name
+        if entry is not None and entry.get('prefix') == prefix:
+            alt_text = entry['alt']
+        else:
+            with span('format_alt_text', 'image'):
+                alt_text = format_alt_text(clean_name)
+
+        # Placeholders are cached with the image entry, so they are computed once per file version
+        placeholder = {field: entry[field] for field in PLACEHOLDER_FIELDS if field in entry} if entry else {}
+        needs_placeholder = _placeholders_enabled and not placeholder
+        if needs_placeholder:
+            with span('placeholder', 'image', file=filename):
+                try:
+                    placeholder = compute_placeholder(file_path)
+                except Exception as e:
+                    print(f"    ! Warning: Could not compute placeholder for {filename}: {e}")
+
+        if cache and (entry is None or entry.get('prefix') != prefix or entry.get('has_thumb') != has_thumb or needs_placeholder):
+            cache.store(file_path, stat, width=width, height=height,
+                        has_thumb=has_thumb, prefix=prefix, alt=alt_text, **placeholder)
+
+        image = {
+            "src": final_src,
+            "thumb": final_thumb,
+            "width": width,
+            "height": height,
+            "alt": alt_text,
+            "filename": filename,  # Keep original filename for cover matching
+            "path": file_path  # Source file on disk, used by the renditions stage
+        }
+        if _placeholders_enabled:
+            image.update(placeholder)
+        return image
+    except Exception as e:
+        print(f"    Error processing image {filename} in {rel_path_prefix or scan_path}: {e}")
+        return None
+
+def get_images_from_folder(base_folder, subfolder_path, prefix, cache=None):
     """
     Scans a specific directory for images.
     Returns image objects with paths relative to base_folder
+    If a ScanCache is given, unchanged files are served from it without opening them.
+    When running with --jobs, the files are probed on the shared image pool.
     """
-    images_list = []
-
     # Full path to scan
     scan_path = os.path.join(base_folder, subfolder_path) if subfolder_path else base_folder
 
@@ -69,53 +165,20 @@ def get_images_from_folder(base_folder, subfolder_path, prefix):
         print(f"    ! Warning: Folder not found {scan_path}")
         return []
 
-    for filename in sorted(os.listdir(scan_path)):
-        file_path = os.path.join(scan_path, filename)
+    with span('folder', 'folder', folder=scan_path):
+        # One listing per folder: used both for iteration and for thumbnail lookups
+        with span('listdir', 'folder'):
+            folder_files = set(os.listdir(scan_path))
 
-        if os.path.isdir(file_path):
-            continue  # Skip directories
+        def scan(filename):
+            with span('image', 'image', file=filename):
+                return scan_image(scan_path, filename, folder_files, rel_path_prefix, prefix, cache)
 
-        ext = os.path.splitext(filename)[1].lower()
-        base_name = os.path.splitext(filename)[0]
+        # map() keeps the sorted filename order in both the serial and the pooled case
+        mapper = _image_pool.map if _image_pool else map
+        return [img for img in mapper(scan, sorted(folder_files)) if img is not None]
 
-        # Skip non-images and thumbnails
-        if ext not in ALLOWED_EXTENSIONS or '_thumb' in base_name:
-            continue
-
-        try:
-            # Get dimensions automatically
-            with Image.open(file_path) as img:
-                width, height = img.size
-
-            # Check if a thumbnail exists
-            thumb_name = filename.replace(ext, f"_thumb{ext}")
-            has_thumb = os.path.exists(os.path.join(scan_path, thumb_name))
-
-            # Determine final Src/Thumb paths (Relative to Gallery Root)
-            final_src = f"{rel_path_prefix}{filename}"
-            final_thumb = f"{rel_path_prefix}{thumb_name}" if has_thumb else final_src
-
-            # Generate Alt Text (Strip prefix if present)
-            if prefix and base_name.startswith(prefix):
-                clean_name = base_name[len(prefix):]
-            else:
-                clean_name = base_name
-            alt_text = format_alt_text(clean_name)
-
-            images_list.append({
-                "src": final_src,
-                "thumb": final_thumb,
-                "width": width,
-                "height": height,
-                "alt": alt_text,
-                "filename": filename  # Keep original filename for cover matching
-            })
-        except Exception as e:
-            print(f"    Error processing image {filename} in {subfolder_path}: {e}")
-
-    return images_list
-
-def build_gallery_data(folder_name):
+def build_gallery_data(folder_name, cache=None):
     """
     Reads metadata and scans images for a SINGLE gallery folder.
     Returns the full gallery dictionary object (including internal metadata).
@@ -163,7 +226,7 @@ def build_gallery_data(folder_name):
             break
 
     # Process Root Images (Always the first section)
-    root_images = get_images_from_folder(root_folder_path, '', prefix)
+    root_images = get_images_from_folder(root_folder_path, '', prefix, cache)
     if root_images:
         gallery_data['sections'].append({
             "title": "",
@@ -179,7 +242,7 @@ def build_gallery_data(folder_name):
         section_images = []
 
         for subfolder in folders:
-            imgs = get_images_from_folder(root_folder_path, subfolder, prefix)
+            imgs = get_images_from_folder(root_folder_path, subfolder, prefix, cache)
             section_images.extend(imgs)
             processed_subfolders.add(subfolder) # Mark as done
 
@@ -193,9 +256,9 @@ def build_gallery_data(folder_name):
     for sub_name in sorted(os.listdir(root_folder_path)):
         sub_path = os.path.join(root_folder_path, sub_name)
 
-        # If it is a directory and we haven't processed it yet
-        if os.path.isdir(sub_path) and sub_name not in processed_subfolders:
-            sub_images = get_images_from_folder(root_folder_path, sub_name, prefix)
+        # If it is a directory and we haven't processed it yet (generated renditions are never a section)
+        if os.path.isdir(sub_path) and sub_name not in processed_subfolders and sub_name != RENDITIONS_DIR:
+            sub_images = get_images_from_folder(root_folder_path, sub_name, prefix, cache)
 
             if sub_images:
                 gallery_data['sections'].append({
@@ -206,15 +269,71 @@ def build_gallery_data(folder_name):
     return gallery_data
 
 
-def generate_site():
+def profiled_gallery(folder_name, cache):
+    with span('gallery', 'gallery', gallery=folder_name):
+        return build_gallery_data(folder_name, cache)
+
+def scan_galleries(folder_names, cache, jobs=1):
+    """
+    Runs build_gallery_data for every folder, yielding (folder_name, gallery_data) in input order.
+    With jobs > 1, galleries are scanned on a thread pool and the images inside each folder
+    on a second pool (two pools, so a gallery task never waits on its own pool).
+    """
+    global _image_pool
+
+    if jobs <= 1:
+        for folder_name in folder_names:
+            yield folder_name, profiled_gallery(folder_name, cache)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as image_pool, ThreadPoolExecutor(max_workers=jobs) as gallery_pool:
+        _image_pool = image_pool
+        try:
+            # Executor.map returns results in submission order, so output matches a serial run
+            results = gallery_pool.map(lambda name: profiled_gallery(name, cache), folder_names)
+            yield from zip(folder_names, results)
+        finally:
+            _image_pool = None
+
+def generate_site(force=False, use_hash=False, jobs=1, renditions=False, static_pages=False, output_format='json', lqip=False):
+    """
+    Scans every gallery folder, writes data/galleries/*.json, the map markers and the home page portfolio component.
+    force=True ignores the scan cache; use_hash=True also validates cache entries by content hash.
+    jobs > 1 scans galleries and images concurrently.
+    renditions=True also encodes the responsive WebP/AVIF renditions of every image.
+    static_pages=True links the index to the prerendered gallery pages instead of gallery-view.html.
+    output_format='compact' writes minified columnar gallery files plus the sharded home page index.
+    lqip=True adds a tiny blurred placeholder and the dominant color to every image (needs Pillow).
+    """
+    global _placeholders_enabled
+    _placeholders_enabled = lqip
+    if lqip:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("  ! Warning: Pillow is not installed, skipping LQIP placeholders.")
+            _placeholders_enabled = False
+
+    cache = ScanCache(force=force, use_hash=use_hash)
+    skipped_galleries = 0
+
     # This dictionary will hold all gallery data to build the index later
     # Structure: { "Category Name": [ {title, link, thumb, alt}, ... ] }
     site_index_data = {}
+    # Galleries with latitude/longitude in their metadata, pinned on the home page map
+    map_markers = []
+
+    with span('scan_galleries'):
+        galleries = list(scan_galleries(os.listdir(IMAGES_DIR), cache, jobs))
+
+    # Responsive renditions are encoded for all galleries at once, so one process pool covers everything
+    if renditions:
+        print("\nGenerating renditions...")
+        with span('renditions'):
+            attach_renditions(galleries, IMAGES_DIR, cache, jobs=jobs, force=force)
 
     # --- MAIN LOOP ---
-    for folder_name in os.listdir(IMAGES_DIR):
-        # Get data for this gallery
-        gallery_data = build_gallery_data(folder_name)
+    for folder_name, gallery_data in galleries:
 
         if not gallery_data:
             continue  # Skip if no data returned
@@ -234,25 +353,34 @@ def generate_site():
 
         # Find Cover image Thumbnail path
         thumb_path = ""
+        thumb_style = ""
         # Search all sections for the cover image
         for sec in gallery_data['sections']:
             for img in sec['images']:
                 # Match either src or original filename
                 if(cover_image and (cover_image in img['src'] or cover_image in img['filename'])) or (not cover_image and not thumb_path):
                     thumb_path = f"/images/{folder_name}/{img['thumb']}"
+                    thumb_style = placeholder_style(img)
                     if cover_image: break # Found specified cover, stop searching                        
                 if thumb_path and cover_image: break
         
         # Add to Site Index Data
+        gallery_id = target_filename.replace('.json', '')
+        gallery_url = f"/{GALLERY_PAGES_DIR}/{gallery_id}.html" if static_pages else f"/gallery.html?id={gallery_id}"
         if thumb_path:
             if category not in site_index_data: site_index_data[category] = []
-            gallery_id = target_filename.replace('.json', '')
             site_index_data[category].append({
+                "id": gallery_id,
                 "title": title,
                 "location": location,
-                "url": f"/gallery-view.html?id={gallery_id}",
+                "url": gallery_url,
                 "thumb": thumb_path,
+                "style": thumb_style,
             })
+
+        marker = marker_entry(gallery_data, gallery_id, gallery_url, thumb_path)
+        if marker:
+            map_markers.append(marker)
         
         # Clean and Save Individual Gallery JSON file
         # remove internal-only fields
@@ -260,36 +388,59 @@ def generate_site():
             if field in gallery_data:
                 del gallery_data[field]
 
-        # Remove 'filename' from images (was only used for cover matching)
+        # Remove 'filename' and 'path' from images (were only used for cover matching and renditions)
         for section in gallery_data['sections']:
             for img in section['images']:
-                if 'filename' in img:
-                    del img['filename']
-
-        with open(os.path.join(DATA_DIR, target_filename), 'w') as outfile:
-            json.dump(gallery_data, outfile, indent=2)
-
+                for field in ['filename', 'path']:
+                    if field in img:
+                        del img[field]
+
+        # Skip rewriting galleries whose output did not change since the last run
+        output_path = os.path.join(DATA_DIR, target_filename)
+        with span('json.dumps', 'gallery', gallery=folder_name):
+            gallery_json = dumps_gallery(gallery_data, output_format)
+        digest = hashlib.sha1(gallery_json.encode('utf-8')).hexdigest()
+
+        if cache.gallery_unchanged(folder_name, output_path, digest):
+            skipped_galleries += 1
+            print(f"  Unchanged {target_filename}, skipped.")
+            continue
 
+        with span('write', 'gallery', gallery=folder_name), open(output_path, 'w', encoding='utf-8') as outfile:
+            outfile.write(gallery_json)
+        cache.mark_gallery(folder_name, output_path, digest)
 
         print(f"  Generated {target_filename} with {len(gallery_data.get('sections', []))} sections.")
 
+    with span('cache.save'):
+        cache.save()
+
     # --- BUILD INDEX PAGE DATA ---
-    print("\nGenerating index.html...")
+    print(f"\nGenerating {PORTFOLIO_COMPONENT}...")
     portfolio_html = ""
 
     # Sort categories based on predefined order
     sorted_categories = [c for c in CATEGORY_ORDER if c in site_index_data]
     other_categories = sorted([c for c in site_index_data if c not in CATEGORY_ORDER])
 
+    if output_format == 'compact':
+        write_gallery_index(sorted_categories + other_categories, site_index_data)
+    else:
+        remove_gallery_index()
+
+    write_map_markers(map_markers, CATEGORY_ORDER)
+
     for category in sorted_categories + other_categories:
         items = site_index_data[category]
         portfolio_html += f'\n<h3 class="section__subtitle--gallery">{category}</h3>\n'
         portfolio_html += '<div class="portfolio">\n'
 
         for item in items:
+            # Blurred placeholder/dominant color shown until the thumbnail has loaded (--lqip)
+            style_attr = f' style="{item["style"]}"' if item['style'] else ''
             portfolio_html += f'''
             <a href="{item['url']}" class="portfolio__item">
-                <img src="{item['thumb']}" alt="{item['title']}" class="portfolio__img"/>
+                <img src="{item['thumb']}" alt="{item['title']}" class="portfolio__img"{style_attr}/>
                 <p class="portfolio__item_alt">
                     {item['title']}
                     <br>
@@ -299,19 +450,28 @@ def generate_site():
             '''
         portfolio_html += '</div>\n'
 
-    # Read the index template
-    if os.path.exists(INDEX_TEMPLATE_FILE):
-        with open(INDEX_TEMPLATE_FILE, 'r') as f:
-            html_content = f.read()
-        
-        final_html = html_content.replace('<!-- PORTFOLIO -->', portfolio_html)
-
-        with open(INDEX_OUTPUT_FILE, 'w') as f:
-            f.write(final_html)
-        
-        print(f"Success! Generated {INDEX_OUTPUT_FILE}.")
+    # build_site.py injects it into index.html (only rebuilt when the markup changed)
+    os.makedirs(build_site.GENERATED_COMPONENTS_DIR, exist_ok=True)
+    if build_site.write_if_changed(build_site.component_path(PORTFOLIO_COMPONENT), portfolio_html):
+        print(f"Success! Generated {PORTFOLIO_COMPONENT}, run build_site.py (or build.py) to update index.html.")
     else:
-        print(f"Error: Index template file '{INDEX_TEMPLATE_FILE}' not found.")
+        print(f"Unchanged {PORTFOLIO_COMPONENT}.")
+
+    print(cache.summary())
+    print(f"Galleries unchanged (not rewritten): {skipped_galleries}")
 
 if __name__ == "__main__":
-    generate_site()
\ No newline at end of file
+    # --force bypasses the scan cache, --hash validates cached entries by content hash
+    # --jobs N scans galleries on N worker threads
+    # --renditions encodes the responsive WebP/AVIF renditions
+    # --lqip adds blurred placeholders and dominant colors to the gallery data and index thumbnails
+    # --format compact writes minified columnar gallery files and the sharded home page index
+    # --static-pages links the index to the prerendered gallery pages (build them with gallery_pages.py)
+    # --profile writes a Chrome trace of the run to .build/profile/ and prints the slowest spans
+    if '--profile' in sys.argv:
+        profiler.enable('generate_galleries')
+    with span('generate_site'):
+        generate_site(force='--force' in sys.argv, use_hash='--hash' in sys.argv, jobs=get_jobs_arg(sys.argv),
+                      renditions='--renditions' in sys.argv, static_pages='--static-pages' in sys.argv,
+                      output_format=get_format_arg(sys.argv), lqip='--lqip' in sys.argv)
+    profiler.finish()
\ No newline at end of file
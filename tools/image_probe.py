@@ -0,0 +1,197 @@
+import os
+import struct
+
+# Configuration
+# How much of the file we read up front. Enough for PNG/WebP headers and
+# the JPEG markers of almost every camera/render output we have.
+PROBE_BYTES = 64 * 1024
+
+# EXIF orientations that rotate the image by 90/270 degrees (width and height swap)
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# JPEG Start-Of-Frame markers carry the dimensions (C4, C8 and CC are DHT/JPG/DAC, not frames)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def parse_exif_orientation(tiff):
+    """
+    Reads the Orientation tag (0x0112) from a TIFF/EXIF block.
+    Returns 1 (normal) if the tag is missing or the block is malformed.
+    """
+    if len(tiff) < 8:
+        return 1
+
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return 1
+
+    try:
+        ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        entry_count = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for i in range(entry_count):
+            entry = ifd_offset + 2 + i * 12
+            tag = struct.unpack(endian + 'H', tiff[entry:entry + 2])[0]
+            if tag == 0x0112:
+                return struct.unpack(endian + 'H', tiff[entry + 8:entry + 10])[0]
+    except struct.error:
+        pass
+    return 1
+
+def _probe_png(f, head):
+    # Signature (8) + IHDR length (4) + 'IHDR' (4) + width (4) + height (4)
+    if len(head) < 24 or head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+
+    # An optional eXIf chunk may appear before the image data
+    orientation = 1
+    pos = 8
+    while pos + 8 <= len(head):
+        length, chunk_type = struct.unpack('>I4s', head[pos:pos + 8])
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+        if chunk_type == b'eXIf':
+            orientation = parse_exif_orientation(head[pos + 8:pos + 8 + length])
+            break
+        pos += 12 + length
+
+    return width, height, orientation
+
+def _probe_jpeg(f, head):
+    orientation = 1
+    pos = 2  # File offset of the current marker
+    base = 0  # File offset of data[0]
+    data = head
+
+    while True:
+        # Pull more of the file in if a large segment (ICC profile, thumbnail) pushed us past the buffer
+        if pos + 9 > base + len(data):
+            f.seek(pos)
+            data, base = f.read(PROBE_BYTES), pos
+            if len(data) < 9:
+                return None
+        i = pos - base
+
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+
+        # Padding bytes and standalone markers without a length field
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            return None  # Reached end of image / scan data without a frame header
+
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height, orientation
+
+        if marker == 0xE1:
+            # APP1 - EXIF lives here, always before the frame header
+            if pos + 2 + length > base + len(data):
+                f.seek(pos)
+                data, base = f.read(length + 2 + PROBE_BYTES), pos
+                i = 0
+            segment = data[i + 4:i + 2 + length]
+            if segment[:6] == b'Exif\x00\x00':
+                orientation = parse_exif_orientation(segment[6:])
+
+        pos += 2 + length
+
+def _probe_webp(f, head):
+    if len(head) < 30:
+        return None
+
+    chunk = head[12:16]
+    orientation = 1
+
+    if chunk == b'VP8 ':
+        # Lossy: 3 byte frame tag, start code 9d 01 2a, then 14 bit width/height
+        if head[23:26] != b'\x9d\x01\x2a':
+            return None
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF, orientation
+
+    if chunk == b'VP8L':
+        # Lossless: signature byte 0x2f, then 14 bit (width - 1) and 14 bit (height - 1)
+        if head[20] != 0x2F:
+            return None
+        bits = struct.unpack('<I', head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, orientation
+
+    if chunk == b'VP8X':
+        # Extended: flags, 3 reserved bytes, 24 bit (width - 1) and 24 bit (height - 1)
+        flags = head[20]
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+
+        if flags & 0x08:
+            # EXIF flag set - walk the chunk headers (seeking past pixel data) to find it
+            pos = 12
+            file_size = os.fstat(f.fileno()).st_size
+            while pos + 8 <= file_size:
+                f.seek(pos)
+                chunk_type, length = struct.unpack('<4sI', f.read(8))
+                if chunk_type == b'EXIF':
+                    exif = f.read(length)
+                    # Some encoders keep the 'Exif\0\0' APP1 prefix
+                    if exif[:6] == b'Exif\x00\x00':
+                        exif = exif[6:]
+                    orientation = parse_exif_orientation(exif)
+                    break
+                pos += 8 + length + (length & 1)
+
+        return width, height, orientation
+
+    return None
+
+def probe_image(file_path):
+    """
+    Reads (width, height, exif_orientation) from the file header only.
+    Supports JPEG, PNG and WebP. Returns None if the format is not recognised or the header is unusual.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(PROBE_BYTES)
+
+        try:
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                return _probe_png(f, head)
+            if head[:2] == b'\xff\xd8':
+                return _probe_jpeg(f, head)
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                return _probe_webp(f, head)
+        except (struct.error, IndexError):
+            return None
+    return None
+
+def _pil_image_size(file_path):
+    # Pillow is only needed for files the header prober could not handle
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        width, height = img.size
+        orientation = img.getexif().get(0x0112, 1)
+    return width, height, orientation
+
+def get_image_size(file_path):
+    """
+    Returns the display (width, height) of an image, with EXIF rotation applied,
+    so portrait shots report a portrait size.
+    Tries the header-only prober first and falls back to Pillow for anything unusual.
+    """
+    result = probe_image(file_path)
+    if result is None:
+        result = _pil_image_size(file_path)
+
+    width, height, orientation = result
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
@@ -0,0 +1,55 @@
+import os
+import json
+
+import build_site
+
+# Configuration
+MARKERS_FILE = 'data/map_markers.json'
+MARKERS_VERSION = 2
+COORDINATE_DIGITS = 5  # ~1 m, plenty for a pin
+
+def marker_entry(gallery_data, gallery_id, url, thumb_path):
+    """
+    Returns the map marker of a gallery, or None if its metadata has no coordinates.
+    Reads latitude/longitude and the optional pin color from the gallery's metadata.json
+    (without one, map.js uses its default pin color).
+    """
+    try:
+        lat = round(float(gallery_data['latitude']), COORDINATE_DIGITS)
+        lng = round(float(gallery_data['longitude']), COORDINATE_DIGITS)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return {
+        "id": gallery_id,
+        "title": gallery_data.get('title', ''),
+        "location": gallery_data.get('location', ''),
+        "category": gallery_data.get('category', 'Uncategorized'),
+        "color": gallery_data.get('color'),
+        "lat": lat,
+        "lng": lng,
+        "url": url,
+        "thumb": thumb_path,
+    }
+
+def write_map_markers(markers, ordered_categories):
+    """
+    Writes MARKERS_FILE in the columnar layout of the gallery index:
+    one array per field, category names stored once and referenced by index.
+    """
+    categories = [c for c in ordered_categories if any(m['category'] == c for m in markers)]
+    categories += sorted({m['category'] for m in markers} - set(categories))
+
+    data = {"version": MARKERS_VERSION, "categories": categories, "category": [],
+            "id": [], "title": [], "location": [], "color": [], "lat": [], "lng": [], "url": [], "thumb": []}
+    for marker in markers:
+        data['category'].append(categories.index(marker['category']))
+        for key in ('id', 'title', 'location', 'color', 'lat', 'lng', 'url', 'thumb'):
+            data[key].append(marker[key])
+
+    # Unchanged markers keep their mtime, so build.py and the watcher do not see a change
+    os.makedirs(os.path.dirname(MARKERS_FILE), exist_ok=True)
+    if build_site.write_if_changed(MARKERS_FILE, json.dumps(data, separators=(',', ':'), ensure_ascii=False)):
+        print(f"  Wrote {MARKERS_FILE} ({len(markers)} markers)")
+    else:
+        print(f"  Unchanged {MARKERS_FILE} ({len(markers)} markers)")
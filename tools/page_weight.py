@@ -0,0 +1,333 @@
+import os
+import re
+import sys
+import json
+import gzip
+import html
+import glob
+import fnmatch
+import posixpath
+from html.parser import HTMLParser
+
+import build_site
+from assets import JS_IMPORT_RE, is_external, site_path, split_url
+from gallery_format import GALLERY_PAGES_DIR  # Prerendered gallery pages are analyzed too
+from image_probe import get_image_size
+
+# Configuration
+REPORT_JSON = '.build/reports/page-weight.json'
+REPORT_HTML = '.build/reports/page-weight.html'
+
+# Per-page budgets for production builds (build.py --production), first matching pattern wins.
+# Byte budgets are compressed transfer sizes (gzip for text, as-is for images and fonts);
+# 'render_blocking' counts resources.
+# Keys left out of a budget are not checked.
+GALLERY_BUDGET = {"total": 600_000, "image": 400_000, "script": 100_000, "stylesheet": 60_000, "font": 300_000,
+                  # jQuery, PhotoSwipe, pdf.js and Supabase are still loaded from the template head
+                  "render_blocking": 9}
+PAGE_BUDGETS = {
+    # The services background (images/services_4k.jpg) is most of this; it is flagged as oversized below
+    "index.html": {"total": 3_000_000, "image": 2_800_000, "script": 100_000, "stylesheet": 60_000, "font": 300_000,
+                   "render_blocking": 5},
+    "gallery.html": GALLERY_BUDGET,
+    f"{GALLERY_PAGES_DIR}/*": GALLERY_BUDGET,
+    "*": {"total": 600_000, "image": 400_000, "script": 100_000, "stylesheet": 60_000, "font": 300_000, "render_blocking": 4},
+}
+
+# Images above either limit are reported as oversized
+OVERSIZED_IMAGE_BYTES = 500_000
+OVERSIZED_IMAGE_WIDTH = 2560  # Widest rendition the site generates (derivatives.RENDITION_WIDTHS)
+
+RESOURCE_TYPES = {
+    '.css': 'stylesheet',
+    '.js': 'script', '.mjs': 'script',
+    '.jpg': 'image', '.jpeg': 'image', '.png': 'image', '.webp': 'image', '.avif': 'image',
+    '.gif': 'image', '.svg': 'image', '.ico': 'image',
+    '.woff': 'font', '.woff2': 'font', '.ttf': 'font', '.otf': 'font',
+    '.html': 'document', '.json': 'data',
+}
+# Sent compressed by the server (see precompress.py), so their transfer size is the gzip size
+COMPRESSED_EXTENSIONS = {'.html', '.css', '.js', '.mjs', '.json', '.svg'}
+
+CSS_URL_RE = re.compile(r'''url\(\s*(["']?)([^"')]+)\1\s*\)|@import\s+(["'])([^"']+)\3''')
+
+# --- MARKUP ---
+
+class ResourceCollector(HTMLParser):
+    """
+    Collects the resources a page loads as (url, type or None, render_blocking),
+    plus the text of inline module scripts (their imports are followed too).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.resources, self.inline_modules = [], []
+        self.in_head, self.in_module = False, False
+
+    def add(self, url, resource_type=None, blocking=False):
+        if url and not url.startswith(('data:', '#', 'mailto:', 'tel:', 'javascript:')):
+            self.resources.append((url.strip(), resource_type, blocking))
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'body':
+            self.in_head = False
+        elif tag == 'link':
+            rel = (attributes.get('rel') or '').lower().split()
+            href = attributes.get('href')
+            if 'stylesheet' in rel:
+                media = (attributes.get('media') or 'all').lower()
+                self.add(href, 'stylesheet', self.in_head and media != 'print')
+            elif 'preload' in rel or 'modulepreload' in rel:
+                self.add(href, {'style': 'stylesheet', 'font': 'font', 'image': 'image'}.get(attributes.get('as'), 'script'))
+            elif 'icon' in rel or 'apple-touch-icon' in rel:
+                self.add(href, 'image')
+        elif tag == 'script':
+            is_module = attributes.get('type') == 'module'
+            if attributes.get('src'):
+                blocking = self.in_head and not is_module and 'async' not in attributes and 'defer' not in attributes
+                self.add(attributes['src'], 'script', blocking)
+            self.in_module = is_module and not attributes.get('src')
+        elif tag in ('img', 'source', 'video', 'audio', 'iframe', 'embed'):
+            if attributes.get('src'):
+                self.add(attributes['src'], 'document' if tag == 'iframe' else None)
+            elif attributes.get('srcset'):
+                # The browser picks one candidate; count the first (the smallest in this site's markup)
+                self.add(attributes['srcset'].split(',')[0].split()[0])
+            if attributes.get('poster'):
+                self.add(attributes['poster'], 'image')
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        elif tag == 'script':
+            self.in_module = False
+
+    def handle_data(self, data):
+        if self.in_module:
+            self.inline_modules.append(data)
+
+# --- RESOURCES ---
+
+def resource_type(path, hint=None):
+    return hint or RESOURCE_TYPES.get(posixpath.splitext(path)[1].lower(), 'other')
+
+def transfer_size(disk_path, data):
+    if posixpath.splitext(disk_path)[1].lower() in COMPRESSED_EXTENSIONS:
+        return len(gzip.compress(data, compresslevel=6, mtime=0))
+    return len(data)
+
+def resolve(url, base_url):
+    """
+    Returns the site path of a local reference ('/styles/a.css'), resolved against the referring file.
+    """
+    path, _ = split_url(url)
+    return site_path(path, base_url)
+
+def disk_path(url_path, root):
+    return os.path.join(root, *url_path.lstrip('/').split('/'))
+
+def analyze_page(output_name, root='.'):
+    """
+    Follows everything the page references (stylesheets with their url()/@import, scripts with
+    their module imports, images, fonts) and returns the page's entry for the report.
+    Fonts and images referenced from CSS are all counted, so those totals are an upper bound.
+    """
+    page_url = '/' + output_name.replace(os.sep, '/')
+    with open(disk_path(page_url, root), 'rb') as f:
+        page_data = f.read()
+
+    collector = ResourceCollector()
+    collector.feed(page_data.decode('utf-8', errors='replace'))
+
+    resources, external, missing, seen = [], [], [], set()
+    queue = [(url, hint, blocking, page_url) for url, hint, blocking in collector.resources]
+    queue += [(match.group(3), 'script', False, page_url) for text in collector.inline_modules for match in JS_IMPORT_RE.finditer(text)]
+
+    while queue:
+        url, hint, blocking, base_url = queue.pop(0)
+        if is_external(url):
+            if url.startswith(('http:', 'https:', '//')) and url not in seen:
+                seen.add(url)
+                external.append({"url": url, "type": resource_type(split_url(url)[0], hint), "blocking": blocking})
+            continue
+
+        url_path = resolve(url, base_url)
+        if url_path in seen:
+            continue
+        seen.add(url_path)
+        path = disk_path(url_path, root)
+        if not os.path.isfile(path):
+            missing.append(url_path)
+            continue
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        kind = resource_type(url_path, hint)
+        resources.append({"url": url_path, "type": kind, "bytes": len(data),
+                          "transfer_bytes": transfer_size(path, data), "blocking": blocking})
+
+        # Follow what this resource loads in turn
+        if kind == 'stylesheet':
+            for match in CSS_URL_RE.finditer(data.decode('utf-8', errors='replace')):
+                imported = match.group(4)
+                queue.append((imported or match.group(2), 'stylesheet' if imported else None, blocking and bool(imported), url_path))
+        elif kind == 'script':
+            for match in JS_IMPORT_RE.finditer(data.decode('utf-8', errors='replace')):
+                queue.append((match.group(3), 'script', False, url_path))
+
+    oversized = []
+    for resource in resources:
+        if resource['type'] != 'image':
+            continue
+        width = None
+        try:
+            width, _ = get_image_size(disk_path(resource['url'], root))
+        except Exception:
+            pass  # SVG/ICO: size check only
+        if resource['bytes'] > OVERSIZED_IMAGE_BYTES or (width or 0) > OVERSIZED_IMAGE_WIDTH:
+            oversized.append({"url": resource['url'], "bytes": resource['bytes'], "width": width})
+
+    totals = {}
+    document = {"url": page_url, "type": 'document', "bytes": len(page_data),
+                "transfer_bytes": transfer_size(page_url, page_data), "blocking": False}
+    for resource in [document] + resources:
+        row = totals.setdefault(resource['type'], {"count": 0, "bytes": 0, "transfer_bytes": 0})
+        row['count'] += 1
+        row['bytes'] += resource['bytes']
+        row['transfer_bytes'] += resource['transfer_bytes']
+
+    render_blocking = [r['url'] for r in resources + external if r['blocking']]
+    return {
+        "totals": totals,
+        "total_bytes": sum(row['bytes'] for row in totals.values()),
+        "total_transfer_bytes": sum(row['transfer_bytes'] for row in totals.values()),
+        "render_blocking": render_blocking,
+        "resources": resources,
+        "external": external,
+        "missing": missing,
+        "oversized_images": oversized,
+    }
+
+def page_budget(output_name):
+    for pattern, budget in PAGE_BUDGETS.items():
+        if fnmatch.fnmatch(output_name, pattern):
+            return pattern, budget
+    return None, {}
+
+def check_budget(output_name, entry):
+    """
+    Returns the budget lines the page is over, e.g. "image: 812 KB > 400 KB".
+    """
+    pattern, budget = page_budget(output_name)
+    entry['budget'] = {"pattern": pattern, **budget}
+    over = []
+    for key, limit in budget.items():
+        if key == 'render_blocking':
+            value = len(entry['render_blocking'])
+        elif key == 'total':
+            value = entry['total_transfer_bytes']
+        else:
+            value = entry['totals'].get(key, {}).get('transfer_bytes', 0)
+        if value > limit:
+            over.append(f"{key}: {value} > {limit}" if key == 'render_blocking' else f"{key}: {value / 1000:.0f} KB > {limit / 1000:.0f} KB")
+    return over
+
+# --- REPORTS ---
+
+def write_html_report(report):
+    """
+    A static, dependency-free view of REPORT_JSON.
+    """
+    types = sorted({kind for entry in report['pages'].values() for kind in entry['totals']})
+    rows = []
+    for page, entry in sorted(report['pages'].items()):
+        cells = ''.join(f"<td>{entry['totals'].get(kind, {}).get('transfer_bytes', 0) / 1000:.1f}</td>" for kind in types)
+        status = 'over' if entry['over_budget'] else 'ok'
+        rows.append(f"<tr class=\"{status}\"><th>{html.escape(page)}</th><td>{entry['total_transfer_bytes'] / 1000:.1f}</td>{cells}"
+                    f"<td>{len(entry['render_blocking'])}</td><td>{html.escape('; '.join(entry['over_budget'])) or 'ok'}</td></tr>")
+
+    details = []
+    for page, entry in sorted(report['pages'].items()):
+        items = ''.join(f"<li>{html.escape(r['url'])} <small>{r['type']}, {r['transfer_bytes'] / 1000:.1f} KB{', blocking' if r['blocking'] else ''}</small></li>"
+                        for r in sorted(entry['resources'], key=lambda r: -r['transfer_bytes']))
+        cdn = ''.join(f"<li>{html.escape(r['url'])} <small>{r['type']}{', blocking' if r['blocking'] else ''}</small></li>" for r in entry['external'])
+        flagged = ''.join(f"<li>{html.escape(image['url'])} <small>{image['bytes'] / 1000:.0f} KB, {image['width'] or '?'} px wide</small></li>"
+                          for image in entry['oversized_images'])
+        details.append(f"<h2>{html.escape(page)}</h2>"
+                       + (f"<h3>Oversized images</h3><ul class=\"over\">{flagged}</ul>" if flagged else '')
+                       + f"<h3>Local resources</h3><ul>{items}</ul>"
+                       + (f"<h3>CDN resources (not measured)</h3><ul>{cdn}</ul>" if cdn else ''))
+
+    header = ''.join(f"<th>{kind} KB</th>" for kind in types)
+    document = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Page weight report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 0.3em 0.6em; text-align: right; }}
+tr.over, ul.over {{ color: #b00020; }}
+small {{ color: #666; }}
+</style>
+</head>
+<body>
+<h1>Page weight</h1>
+<p>Transfer sizes (gzip for text). Fonts and images referenced from CSS are all counted.</p>
+<table>
+<tr><th>Page</th><th>Total KB</th>{header}<th>Blocking</th><th>Budget</th></tr>
+{''.join(rows)}
+</table>
+{''.join(details)}
+</body>
+</html>
+"""
+    with open(REPORT_HTML, 'w', encoding='utf-8') as f:
+        f.write(document)
+
+def output_pages(root='.'):
+    pages = [output_name for output_name in build_site.PAGES.values() if os.path.isfile(os.path.join(root, output_name))]
+    pages += sorted(os.path.relpath(path, root).replace(os.sep, '/') for path in glob.glob(os.path.join(root, GALLERY_PAGES_DIR, '*.html')))
+    return pages
+
+def analyze_site(root='.'):
+    """
+    Analyzes every built page, writes REPORT_JSON and REPORT_HTML, and prints a summary.
+    Returns False if any page is over its budget.
+    """
+    report = {"budgets": PAGE_BUDGETS, "pages": {}}
+    within_budget = True
+
+    print(f"  {'Page':<32}{'Total KB':>10}{'Images':>10}{'Scripts':>10}{'CSS':>10}{'Fonts':>10}{'Blocking':>10}")
+    for output_name in output_pages(root):
+        entry = analyze_page(output_name, root)
+        entry['over_budget'] = check_budget(output_name, entry)
+        report['pages'][output_name] = entry
+
+        kb = lambda kind: f"{entry['totals'].get(kind, {}).get('transfer_bytes', 0) / 1000:.1f}"
+        print(f"  {output_name:<32}{entry['total_transfer_bytes'] / 1000:>10.1f}{kb('image'):>10}{kb('script'):>10}"
+              f"{kb('stylesheet'):>10}{kb('font'):>10}{len(entry['render_blocking']):>10}")
+
+        for image in entry['oversized_images']:
+            print(f"  ! Warning: {image['url']} is oversized ({image['bytes'] / 1000:.0f} KB, {image['width'] or '?'} px wide)")
+        for url_path in entry['missing']:
+            print(f"  ! Warning: {output_name} references {url_path}, which does not exist.")
+        if entry['over_budget']:
+            within_budget = False
+            print(f"  [!] {output_name} is over budget: {', '.join(entry['over_budget'])}")
+
+    os.makedirs(os.path.dirname(REPORT_JSON), exist_ok=True)
+    with open(REPORT_JSON, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    write_html_report(report)
+    print(f"  Wrote {REPORT_JSON} and {REPORT_HTML}")
+    return within_budget
+
+if __name__ == "__main__":
+    # Run after a production build (build.py --production runs it as the page_weight stage).
+    # Exits with 1 if a page is over budget.
+    sys.exit(0 if analyze_site() else 1)
@@ -0,0 +1,76 @@
+import io
+import base64
+
+# Configuration
+LQIP_SIZE = 16  # Longest side of the inline placeholder, in pixels
+LQIP_QUALITY = 40
+COLOR_SAMPLE_SIZE = 64  # Dominant color is computed on a buffer of at most this size
+COLOR_BITS = 4  # Bits per channel when bucketing colors (4 -> 4096 buckets)
+
+def load_downscaled(path, size):
+    """
+    Opens an image at roughly `size` pixels on the long side, EXIF rotation applied.
+    JPEGs are decoded straight at a reduced scale (draft mode), so large renders stay cheap.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        img.draft('RGB', (size * 4, size * 4))
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGB')
+        img.thumbnail((size, size), Image.Resampling.BOX)
+        return img
+
+def dominant_color(img):
+    """
+    Returns the most common color of a small RGB image as '#rrggbb':
+    pixels are bucketed per COLOR_BITS and the fullest bucket is averaged.
+    Vectorized with NumPy when it is installed, Pillow's quantizer otherwise.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is None:
+        quantized = img.quantize(colors=8)
+        palette = quantized.getpalette()
+        _, index = max(quantized.getcolors())
+        r, g, b = palette[index * 3:index * 3 + 3]
+        return f"#{r:02x}{g:02x}{b:02x}"
+
+    pixels = np.asarray(img, dtype=np.uint8).reshape(-1, 3)
+    shift = 8 - COLOR_BITS
+    buckets = pixels >> shift
+    keys = (buckets[:, 0].astype(np.int32) << (2 * COLOR_BITS)) | (buckets[:, 1].astype(np.int32) << COLOR_BITS) | buckets[:, 2]
+    top = np.bincount(keys).argmax()
+    r, g, b = pixels[keys == top].mean(axis=0).round().astype(int)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def compute_placeholder(path):
+    """
+    Returns {'lqip': tiny WebP data URI, 'color': dominant color} for one image.
+    Needs Pillow; NumPy is optional.
+    """
+    sample = load_downscaled(path, COLOR_SAMPLE_SIZE)
+    color = dominant_color(sample)
+
+    tiny = sample.copy()
+    tiny.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'WEBP', quality=LQIP_QUALITY, method=6)
+    lqip = 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    return {"lqip": lqip, "color": color}
+
+def placeholder_style(img):
+    """
+    Inline style that paints the placeholder behind an <img> until the real image has loaded.
+    Returns '' for images without placeholder data.
+    """
+    if not img.get('lqip') and not img.get('color'):
+        return ''
+    layers = [img.get('color') or 'transparent']
+    if img.get('lqip'):
+        layers.append(f"url({img['lqip']}) center / cover no-repeat")
+    return f"background: {' '.join(layers)};"
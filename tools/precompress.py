@@ -0,0 +1,186 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from cli_args import get_jobs_arg
+
+# Configuration
+SITE_ROOT = '.'
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.xml', '.txt', '.map'}
+# Source folders are not served, only the generated pages and the assets they reference
+EXCLUDED_DIRS = {'.git', '.github', '.build', '.vscode', 'tools', 'templates', 'components', '__pycache__', 'node_modules'}
+STATE_FILE = '.build/cache/precompress.json'
+
+# Files smaller than this are sent as-is (the headers cost more than they save)
+MIN_FILE_SIZE = 256
+# A compressed copy is only kept if it is at most this fraction of the original
+MAX_RATIO = 0.95
+
+# Maximum compression levels - this runs once per build, not per request
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+ZSTD_LEVEL = 22
+
+def available_formats():
+    """
+    Returns the sibling extensions we can write. gzip is built in; Brotli and zstd
+    need the optional 'brotli' and 'zstandard' packages.
+    """
+    formats = ['.gz']
+    try:
+        import brotli  # noqa: F401
+        formats.append('.br')
+    except ImportError:
+        print("  ! Warning: 'brotli' is not installed, skipping .br files.")
+    try:
+        import zstandard  # noqa: F401
+        formats.append('.zst')
+    except ImportError:
+        print("  ! Warning: 'zstandard' is not installed, skipping .zst files.")
+    return formats
+
+def compress(data, fmt):
+    if fmt == '.gz':
+        # mtime=0 keeps the output byte-identical between builds
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if fmt == '.br':
+        import brotli
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+    if fmt == '.zst':
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unknown compression format {fmt}")
+
+def compress_file(path, formats):
+    """
+    Worker: writes the compressed siblings of one file.
+    Returns { format: compressed size or None (not worth it) }.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    results = {}
+    for fmt in formats:
+        compressed = compress(data, fmt)
+        sibling = path + fmt
+        if len(compressed) <= len(data) * MAX_RATIO:
+            with open(sibling, 'wb') as f:
+                f.write(compressed)
+            results[fmt] = len(compressed)
+        else:
+            # Compression doesn't help - make sure no stale sibling is served instead
+            if os.path.exists(sibling):
+                os.remove(sibling)
+            results[fmt] = None
+    return results
+
+def find_targets(root=SITE_ROOT):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                path = os.path.join(dirpath, filename)
+                if os.path.getsize(path) >= MIN_FILE_SIZE:
+                    yield os.path.relpath(path, root)
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  Warning: Could not read precompress state: {e}")
+    return {}
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+def is_up_to_date(entry, path, digest, formats):
+    if entry is None or entry['sha1'] != digest or sorted(entry['results']) != sorted(formats):
+        return False
+    return all(size is None or os.path.exists(path + fmt) for fmt, size in entry['results'].items())
+
+def precompress_site(root=SITE_ROOT, jobs=None, force=False):
+    """
+    Writes .gz/.br/.zst siblings for every compressible build output, skipping
+    files whose content hash has not changed since the last run. Prints a savings table.
+    """
+    formats = available_formats()
+    previous = {} if force else load_state()
+    state = {}
+    pending = []
+
+    for rel_path in find_targets(root):
+        path = os.path.join(root, rel_path)
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        entry = previous.get(rel_path)
+        if is_up_to_date(entry, path, digest, formats):
+            state[rel_path] = entry
+        else:
+            state[rel_path] = {"sha1": digest, "size": os.path.getsize(path), "results": {}}
+            pending.append(rel_path)
+
+    print(f"Precompressing {len(pending)} file(s) ({len(state) - len(pending)} unchanged)...")
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {rel_path: pool.submit(compress_file, os.path.join(root, rel_path), formats) for rel_path in pending}
+            for rel_path, future in futures.items():
+                try:
+                    state[rel_path]['results'] = future.result()
+                except Exception as e:
+                    print(f"  Error compressing {rel_path}: {e}")
+                    del state[rel_path]
+
+    # Sources that disappeared (e.g. old fingerprinted assets) take their siblings with them
+    for rel_path in previous.keys() - state.keys():
+        for fmt in ('.gz', '.br', '.zst'):
+            sibling = os.path.join(root, rel_path + fmt)
+            if os.path.exists(sibling):
+                os.remove(sibling)
+
+    save_state(state)
+    print_savings_table(state, formats)
+    return state
+
+def print_savings_table(state, formats):
+    """
+    One row per file type: original bytes and the bytes (and saving) for each format.
+    Files where a format did not help count at their original size for that format.
+    """
+    totals = {}
+    for rel_path, entry in state.items():
+        ext = os.path.splitext(rel_path)[1].lower()
+        row = totals.setdefault(ext, {"count": 0, "size": 0, **{fmt: 0 for fmt in formats}})
+        row['count'] += 1
+        row['size'] += entry['size']
+        for fmt in formats:
+            size = entry['results'].get(fmt)
+            row[fmt] += entry['size'] if size is None else size
+
+    header = f"  {'Type':<8}{'Files':>7}{'Original':>12}" + ''.join(f"{fmt:>18}" for fmt in formats)
+    print(header)
+    print('  ' + '-' * (len(header) - 2))
+
+    grand = {"count": 0, "size": 0, **{fmt: 0 for fmt in formats}}
+    for ext, row in sorted(totals.items()) + [('TOTAL', None)]:
+        if row is None:
+            row, ext = grand, 'TOTAL'
+            print('  ' + '-' * (len(header) - 2))
+        else:
+            for key in grand:
+                grand[key] += row[key]
+        cells = ''.join(
+            f"{row[fmt]:>10} ({(1 - row[fmt] / row['size']) * 100 if row['size'] else 0:>3.0f}%)" for fmt in formats
+        )
+        print(f"  {ext:<8}{row['count']:>7}{row['size']:>12}{cells}")
+
+if __name__ == "__main__":
+    # --force recompresses everything, --jobs N limits the worker processes (default: all cores)
+    jobs = get_jobs_arg(sys.argv) if any(arg.startswith('--jobs') for arg in sys.argv) else None
+    precompress_site(jobs=jobs, force='--force' in sys.argv)
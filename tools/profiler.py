@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+# Configuration
+PROFILE_DIR = '.build/profile'
+TOP_N = 15  # Rows in the printed summaries
+
+class _NullSpan:
+    """
+    Returned by span() while profiling is off. Shared and stateless, so a disabled span costs one call.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'category', 'args', 'start')
+
+    def __init__(self, profiler, name, category, args):
+        self.profiler, self.name, self.category, self.args = profiler, name, category, args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.category, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+class Profiler:
+    """
+    Collects finished spans as Chrome trace 'complete' events (viewable in chrome://tracing or ui.perfetto.dev).
+    Spans from worker threads land on their own track; nesting is derived from the timestamps.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter_ns()
+        self.events = []  # list.append is atomic, so threads can record without a lock
+        self.threads = {}
+
+    def record(self, name, category, start, end, args):
+        thread = threading.current_thread()
+        if thread.ident not in self.threads:
+            self.threads[thread.ident] = (len(self.threads) + 1, thread.name)
+        self.events.append((name, category, start, end, self.threads[thread.ident][0], args))
+
+    def trace(self):
+        pid = os.getpid()
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in self.threads.values()
+        ]
+        for name, category, start, end, tid, args in sorted(self.events, key=lambda e: e[2]):
+            event = {
+                "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000,
+            }
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": {"tool": self.name}}
+
+    def print_summary(self, top_n=TOP_N):
+        """
+        Prints the span kinds by total time, then the slowest individual spans.
+        """
+        totals = {}
+        for name, _, start, end, _, _ in self.events:
+            count, total, longest = totals.get(name, (0, 0, 0))
+            totals[name] = (count + 1, total + end - start, max(longest, end - start))
+
+        print(f"\n  {'Span':<28}{'Count':>8}{'Total ms':>12}{'Max ms':>10}")
+        for name, (count, total, longest) in sorted(totals.items(), key=lambda t: -t[1][1])[:top_n]:
+            print(f"  {name:<28}{count:>8}{total / 1e6:>12.2f}{longest / 1e6:>10.2f}")
+
+        print(f"\n  Slowest {top_n} spans:")
+        for name, _, start, end, _, args in sorted(self.events, key=lambda e: e[2] - e[3])[:top_n]:
+            detail = ' '.join(str(value) for value in args.values()) if args else ''
+            print(f"  {(end - start) / 1e6:>10.2f} ms  {name} {detail}".rstrip())
+
+_active = None
+
+def span(name, category='build', **args):
+    """
+    Times a block: `with span('image', file=filename): ...`.
+    Returns the shared no-op span unless profiling was enabled.
+    """
+    if _active is None:
+        return NULL_SPAN
+    return _Span(_active, name, category, args)
+
+def enable(name):
+    """
+    Starts collecting spans for this process. name is used for the trace file.
+    """
+    global _active
+    _active = Profiler(name)
+    return _active
+
+def is_enabled():
+    return _active is not None
+
+def finish(top_n=TOP_N):
+    """
+    Stops profiling, writes the trace to PROFILE_DIR and prints the summaries.
+    Returns the trace path (None if profiling was off).
+    """
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{profiler.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profiler.trace(), f)
+
+    profiler.print_summary(top_n)
+    print(f"\n  [P] Wrote {len(profiler.events)} spans to {path} (open in ui.perfetto.dev or chrome://tracing)")
+    return path
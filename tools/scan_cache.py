@@ -0,0 +1,147 @@
+import os
+import json
+import hashlib
+import threading
+
+# Configuration
+CACHE_DIR = '.build/cache'
+CACHE_FILE = os.path.join(CACHE_DIR, 'gallery_scan.json')
+
+# Bump this whenever the shape of a cached entry changes,
+# so stale manifests from older builds are thrown away instead of misread.
+CACHE_VERSION = 2
+
+def file_digest(file_path):
+    """
+    Returns the SHA-1 hex digest of a file's content (read in 1MB chunks).
+    """
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ScanCache:
+    """
+    On-disk manifest of previously scanned images.
+    Entries are keyed by file path and validated against size + mtime
+    (and optionally the content hash), so unchanged files never have to be reopened.
+    """
+
+    def __init__(self, path=CACHE_FILE, force=False, use_hash=False):
+        self.path = path
+        self.force = force
+        self.use_hash = use_hash
+        self.images = {}
+        self.galleries = {}
+        self.hits = 0
+        self.misses = 0
+        self.seen = set()
+        self.seen_galleries = set()
+        self._lock = threading.Lock()
+
+        if not force:
+            self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.images = data.get('images', {})
+                self.galleries = data.get('galleries', {})
+        except Exception as e:
+            print(f"  Warning: Could not read scan cache '{self.path}': {e}")
+
+    def save(self, prune=True):
+        """
+        Writes the manifest to disk. With prune=True, entries for files that were
+        not seen during this run (deleted/renamed images and galleries) are dropped.
+        """
+        if prune:
+            self.images = {path: entry for path, entry in self.images.items() if path in self.seen}
+            self.galleries = {name: entry for name, entry in self.galleries.items() if name in self.seen_galleries}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            "version": CACHE_VERSION,
+            "images": self.images,
+            "galleries": self.galleries,
+        }
+        # Write to a temp file first so an interrupted build never leaves a half-written manifest
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, file_path, stat):
+        """
+        Returns the cached entry for file_path if it is still valid, otherwise None.
+        Counts the result as a hit or a miss.
+        """
+        entry = None if self.force else self.images.get(file_path)
+        with self._lock:
+            self.seen.add(file_path)
+
+        if entry is not None and (entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns):
+            # Size/mtime changed. With hashing enabled the file may still be identical
+            # (e.g. after a fresh checkout touched every mtime).
+            if self.use_hash and entry.get('sha1') and entry['size'] == stat.st_size \
+                    and entry['sha1'] == file_digest(file_path):
+                with self._lock:
+                    entry['mtime'] = stat.st_mtime_ns
+            else:
+                entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def store(self, file_path, stat, **values):
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        if self.use_hash:
+            entry['sha1'] = file_digest(file_path)
+        entry.update(values)
+        with self._lock:
+            self.images[file_path] = entry
+        return entry
+
+    def content_hash(self, file_path):
+        """
+        Returns the SHA-1 of a scanned file, reusing the hash stored in its cache entry when present.
+        """
+        entry = self.images.get(file_path)
+        if entry is not None and entry.get('sha1'):
+            return entry['sha1']
+
+        digest = file_digest(file_path)
+        if entry is not None:
+            with self._lock:
+                entry['sha1'] = digest
+        return digest
+
+    def gallery_unchanged(self, folder_name, output_path, digest):
+        """
+        True if the gallery JSON we are about to write is identical to the one written last time.
+        """
+        with self._lock:
+            self.seen_galleries.add(folder_name)
+        if self.force or not os.path.exists(output_path):
+            return False
+        previous = self.galleries.get(folder_name)
+        return previous is not None and previous.get('output') == output_path and previous.get('digest') == digest
+
+    def mark_gallery(self, folder_name, output_path, digest):
+        with self._lock:
+            self.galleries[folder_name] = {"output": output_path, "digest": digest}
+            self.seen_galleries.add(folder_name)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return f"Scan cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
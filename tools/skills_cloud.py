@@ -0,0 +1,181 @@
+import os
+import json
+import math
+import zlib
+import html
+import hashlib
+
+# Configuration
+SKILLS_FILE = 'data/skills.json'
+CACHE_FILE = '.build/cache/skills_cloud.json'
+
+# One layout per container width; the browser shows the largest one that fits (see breakpoint_css)
+BREAKPOINT_WIDTHS = [320, 480, 768, 1000]
+CLOUD_HEIGHT = 600  # Matches .skills { height: 600px }
+
+# Same look as the old wordcloud2 settings
+FONT_FILE = 'fonts/poppins-cufonfonts-webfont/Poppins-Bold.woff'
+FONT_FAMILY = "'Poppins Bold', Poppins, sans-serif"
+TEXT_COLOR = '#fff'
+WEIGHT_EXPONENT = 2.2  # font size = weight ^ 2.2 * (width / 1024)
+GRID_SIZE = 16  # Gap between words at width 1024, scaled like the font size
+ELLIPTICITY = 0.65
+ROTATE_RATIO = 0.1  # Share of words drawn vertically
+MIN_FONT_SIZE = 10  # Smallest legible size: light words start here, and words that still don't fit are dropped
+
+class TextMeasurer:
+    """
+    Measures words with the site's web font (Pillow reads WOFF), so the layout matches the browser.
+    Falls back to average glyph proportions if Pillow or the font is missing.
+    """
+
+    def __init__(self, font_file=FONT_FILE):
+        self.font_file = font_file
+        self.fonts = {}
+        self.available = True
+        try:
+            from PIL import ImageFont
+            self.image_font = ImageFont
+            ImageFont.truetype(font_file, 10)
+        except Exception as e:
+            print(f"  ! Warning: Cannot measure with {font_file} ({e}), using estimated text widths.")
+            self.available = False
+
+    def measure(self, text, size):
+        """
+        Returns (advance width, line height) of text at the given pixel size.
+        """
+        if not self.available:
+            return len(text) * size * 0.62, size * 1.4
+        size = max(1, round(size))
+        if size not in self.fonts:
+            self.fonts[size] = self.image_font.truetype(self.font_file, size)
+        font = self.fonts[size]
+        ascent, descent = font.getmetrics()
+        return font.getlength(text), ascent + descent
+
+def is_rotated(word):
+    # Deterministic stand-in for wordcloud2's random rotation
+    return zlib.crc32(word.encode('utf-8')) % 100 < ROTATE_RATIO * 100
+
+def overlaps(box, placed):
+    x0, y0, x1, y1 = box
+    return any(x0 < b[2] and b[0] < x1 and y0 < b[3] and b[1] < y1 for b in placed)
+
+def find_position(box_width, box_height, width, height, placed, step):
+    """
+    Walks an elliptical Archimedean spiral out from the center and returns the first
+    (x, y) center where the box fits inside the board without touching placed boxes.
+    """
+    cx, cy = width / 2, height / 2
+    max_radius = math.hypot(width, height / ELLIPTICITY) / 2
+    theta, radius = 0.0, 0.0
+    while radius <= max_radius:
+        x = cx + radius * math.cos(theta)
+        y = cy + radius * ELLIPTICITY * math.sin(theta)
+        box = (x - box_width / 2, y - box_height / 2, x + box_width / 2, y + box_height / 2)
+        if box[0] >= 0 and box[1] >= 0 and box[2] <= width and box[3] <= height and not overlaps(box, placed):
+            placed.append(box)
+            return x, y
+        # Advance about half a grid cell along the curve; the spiral gains one grid cell per turn
+        theta += step / 2 / max(radius, step)
+        radius = step * theta / (2 * math.pi)
+    return None
+
+def layout_cloud(skills, width, height=CLOUD_HEIGHT, measurer=None):
+    """
+    Places [word, weight] pairs (heaviest first, like the JSON) on a width x height board.
+    Returns [{text, x, y, size, rotate}] with x/y the center of each word.
+    """
+    measurer = measurer or TextMeasurer()
+    scale = width / 1024
+    gap = GRID_SIZE * scale
+    placed_boxes, words = [], []
+
+    for text, weight in skills:
+        size = max(math.pow(weight, WEIGHT_EXPONENT) * scale, MIN_FONT_SIZE)
+        rotate = is_rotated(text)
+        while size >= MIN_FONT_SIZE:
+            text_width, text_height = measurer.measure(text, size)
+            box_width, box_height = text_width + gap, text_height * 0.8 + gap
+            if rotate:
+                box_width, box_height = box_height, box_width
+            position = find_position(box_width, box_height, width, height, placed_boxes, max(gap, 2))
+            if position:
+                words.append({"text": text, "x": round(position[0], 1), "y": round(position[1], 1),
+                              "size": round(size, 1), "rotate": rotate})
+                break
+            size *= 0.9  # shrinkToFit
+        else:
+            print(f"  ! Warning: '{text}' does not fit in the {width}px skills cloud, left out.")
+    return words
+
+def render_svg(words, width, height=CLOUD_HEIGHT):
+    parts = [f'<svg class="skills-cloud skills-cloud--{width}" viewBox="0 0 {width} {height}" role="img" aria-label="Skills">']
+    for word in words:
+        transform = f' transform="rotate(-90 {word["x"]} {word["y"]})"' if word['rotate'] else ''
+        parts.append(f'<text x="{word["x"]}" y="{word["y"]}" font-size="{word["size"]}"{transform}>{html.escape(word["text"])}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def breakpoint_css(widths):
+    """
+    Only one layout is visible: the largest breakpoint not wider than the viewport
+    (the section is full width below 1000px and 1000px wide above).
+    """
+    rules = [
+        f".skills-cloud {{ display: none; width: 100%; height: 100%; font-family: {FONT_FAMILY}; font-weight: bold; }}",
+        f".skills-cloud text {{ fill: {TEXT_COLOR}; text-anchor: middle; dominant-baseline: central; cursor: default; }}",
+        ".skills-cloud text.is-active { fill: #404040; }",
+        f".skills-cloud--{widths[0]} {{ display: block; }}",
+    ]
+    for previous, width in zip(widths, widths[1:]):
+        rules.append(f"@media (min-width: {width}px) {{ .skills-cloud--{previous} {{ display: none; }} .skills-cloud--{width} {{ display: block; }} }}")
+    return '\n'.join(rules)
+
+def cache_key(skills_data):
+    """
+    Layouts are reused while the skills file, the font and this script stay the same.
+    """
+    h = hashlib.sha1(skills_data)
+    for path in (FONT_FILE, os.path.abspath(__file__)):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+    h.update(json.dumps([BREAKPOINT_WIDTHS, CLOUD_HEIGHT]).encode('utf-8'))
+    return h.hexdigest()
+
+def render_component():
+    """
+    Returns the prerendered cloud (one SVG per breakpoint plus the switching CSS),
+    computing the layouts only when CACHE_FILE was built from different inputs.
+    """
+    if not os.path.exists(SKILLS_FILE):
+        print(f"  ! Warning: {SKILLS_FILE} not found, skills cloud left empty.")
+        return ""
+    with open(SKILLS_FILE, 'rb') as f:
+        skills_data = f.read()
+    key = cache_key(skills_data)
+
+    cached = None
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except Exception:
+            cached = None
+
+    if cached and cached.get('key') == key:
+        layouts = cached['layouts']
+    else:
+        skills = json.loads(skills_data)
+        measurer = TextMeasurer()
+        layouts = {str(width): layout_cloud(skills, width, measurer=measurer) for width in BREAKPOINT_WIDTHS}
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"key": key, "layouts": layouts}, f)
+        print(f"  [✓] Laid out the skills cloud for {len(BREAKPOINT_WIDTHS)} widths")
+
+    lines = [f"<style>\n{breakpoint_css(BREAKPOINT_WIDTHS)}\n</style>"]
+    lines += [render_svg(layouts[str(width)], width) for width in BREAKPOINT_WIDTHS]
+    return '\n'.join(lines)
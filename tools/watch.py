@@ -1,102 +1,282 @@
-import time
 import os
 import sys
+import time
+import select
+import struct
 import importlib
-import build_site   
-
-def get_watched_files():
-    """
-    Generates a fresh list of all files to watch based on the current
-    configuration in build_site.py.
-    """
-    files = []
-
-    # Watch the build script itself!
-    # This allows us to detect changes to PAGES or COMPONENTS mappings.
-    files.append(os.path.abspath(build_site.__file__))
-
-    # Add Templates
-    for template in build_site.PAGES.keys():
-        path = os.path.join(build_site.TEMPLATES_DIR, template)
-        # Use absolute paths to be safe
-        files.append(os.path.abspath(path))
-
-    # Add Components
-    for component in build_site.COMPONENTS.values():
-        path = os.path.join(build_site.COMPONENTS_DIR, component)
-        files.append(os.path.abspath(path))
-    
-    # Remove duplicates just in case
-    return list(set(files))
-
-print("👀 Watcher started.")
-print("   (Edit 'tools/build_site.py' to add new pages/components - I will auto-reload!)")
-print("(Press Ctrl+C to stop)")
-
-# Initial Load
-watched_files = get_watched_files()
-# Track the last modified time of files
-last_mtimes = {}
-
-# Initialize timestamps
-for f in watched_files:
-    if os.path.exists(f):
-        last_mtimes[f] = os.path.getmtime(f)
-
-while True:
-    try:
-        triggered = False
-        reconfigure = False
-
-        # Check files (Iterate over a copy so we can modify the list safely if needed)
-        for file in list(watched_files):
-            if os.path.exists(file):
-                mtime = os.path.getmtime(file)
-                if file not in last_mtimes:
-                    last_mtimes[file] = mtime
-                
-                # If file changed
-                if mtime > last_mtimes[file]:
-                    last_mtimes[file] = mtime
-                    filename = os.path.basename(file)
-                    print(f"  > Change detected in {filename}")
-                    triggered = True
-
-                    # SPECIAL CASE: If the configuration file changed, we need to reload!
-                    if file == os.path.abspath(build_site.__file__):
-                        reconfigure = True
-        
-        # Handle Configuration Change (Hot Reload)
-        if reconfigure:
-            print("  ↻ Configuration changed. Reloading watch list...")
-            try:
-                # Force Python to re-read build_site.py
-                importlib.reload(build_site)
-
-                # Update the list of files we are watching
-                watched_files = get_watched_files()
-
-                # Initialize timestamps for any NEW files so they don't trigger immediately
-                for f in watched_files:
-                    if f not in last_mtimes and os.path.exists(f):
-                        last_mtimes[f] = os.path.getmtime(f)
-                        print(f"    + Now watching: {os.path.basename(f)}")
-            except Exception as e:                
-                print(f"  [!] Error reloading configuration: {e}")
-                print("      Fix the error in build_site.py and save again.")
-                triggered = False # Don't try to build if config is broken
-
-        # Run Build if needed
-        if triggered:
-            print("⚡ Rebuilding site...")
-            try:
-                build_site.build_site()
-            except Exception as e:
-                print(f"  [!] Error during build: {e}")
-                print("      Fix the error and save again.")
-        
-        time.sleep(1) # Check every second
-        
-    except KeyboardInterrupt:
-        print("\nStopping watcher.")
-        sys.exit(0)
\ No newline at end of file
+import build_site
+import generate_galleries
+from gallery_format import INDEX_DIR
+from map_markers import MARKERS_FILE
+
+# Configuration
+# Directories watched recursively (relative to the project root)
+WATCH_DIRS = ['templates', 'components', 'data', 'images', 'styles', 'scripts', 'tools']
+
+# Generated output and editor/OS noise that must never trigger a rebuild
+# (generate_galleries writes the gallery data, index and map markers, so watching them would loop)
+IGNORED_PATHS = [generate_galleries.DATA_DIR, INDEX_DIR, MARKERS_FILE, '.build']
+IGNORED_DIRNAMES = {'__pycache__', '.git', generate_galleries.RENDITIONS_DIR}
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp', '.part', '.crdownload')
+
+# How long to wait for a burst of saves to settle before acting on it (seconds)
+DEBOUNCE_SECONDS = 0.2
+
+# Fallback polling interval when inotify is not available (seconds)
+POLL_INTERVAL = 0.25
+
+def is_ignored(rel_path):
+    rel_path = rel_path.replace(os.sep, '/')
+    if any(rel_path == p or rel_path.startswith(p + '/') for p in IGNORED_PATHS):
+        return True
+    parts = rel_path.split('/')
+    if any(part in IGNORED_DIRNAMES for part in parts):
+        return True
+    return parts[-1].startswith('.#') or parts[-1].endswith(IGNORED_SUFFIXES)
+
+def iter_watch_dirs():
+    """
+    Yields every directory under WATCH_DIRS that should be watched.
+    """
+    for root in WATCH_DIRS:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not is_ignored(os.path.join(dirpath, d))]
+            yield dirpath
+
+class InotifyWatcher:
+    """
+    Linux inotify watcher (via ctypes, no extra dependency).
+    New sub-directories are picked up automatically.
+    """
+
+    # inotify event masks (see <sys/inotify.h>)
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> directory
+        for directory in iter_watch_dirs():
+            self.add_watch(directory)
+
+    def add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+
+    def poll(self, timeout):
+        """
+        Waits up to `timeout` seconds and returns the set of changed paths (relative to the project root).
+        """
+        changed = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        pos = 0
+        while pos + 16 <= len(data):
+            wd, mask, _cookie, length = struct.unpack_from('iIII', data, pos)
+            name = data[pos + 16:pos + 16 + length].rstrip(b'\0').decode('utf-8', 'replace')
+            pos += 16 + length
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if is_ignored(path):
+                continue
+
+            if mask & self.IN_ISDIR:
+                # Watch newly created/moved-in folders (e.g. a new gallery) and everything inside them
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and os.path.isdir(path):
+                    for dirpath, dirnames, filenames in os.walk(path):
+                        dirnames[:] = [d for d in dirnames if not is_ignored(os.path.join(dirpath, d))]
+                        self.add_watch(dirpath)
+                        changed.update(os.path.join(dirpath, f) for f in filenames)
+                changed.add(path)
+            else:
+                changed.add(path)
+        return changed
+
+class PollingWatcher:
+    """
+    Portable fallback: compares (mtime, size) snapshots of every watched file.
+    """
+
+    def __init__(self):
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for directory in iter_watch_dirs():
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and not is_ignored(entry.path):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, POLL_INTERVAL))
+        current = self.take_snapshot()
+        changed = {path for path in current.keys() | self.snapshot.keys()
+                   if current.get(path) != self.snapshot.get(path)}
+        self.snapshot = current
+        return changed
+
+def create_watcher():
+    """
+    Returns an inotify watcher on Linux, or the polling fallback anywhere else.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print(f"  [!] inotify unavailable ({e}), falling back to polling.")
+    return PollingWatcher()
+
+def wait_for_changes(watcher, debounce=DEBOUNCE_SECONDS):
+    """
+    Blocks until something changes, then keeps collecting events until the
+    files have been quiet for `debounce` seconds. Returns the whole burst as one set.
+    """
+    changed = set()
+    while not changed:
+        changed = watcher.poll(1.0)
+
+    deadline = time.monotonic() + debounce
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return changed
+        more = watcher.poll(remaining)
+        if more:
+            changed |= more
+            deadline = time.monotonic() + debounce  # Still saving - restart the quiet window
+
+def classify_change(path):
+    """
+    Maps a changed path to the action it needs:
+    'config' (build_site.py and the other build scripts), 'galleries-config' (generate_galleries.py),
+    'pages', 'galleries' or 'static'.
+    """
+    rel_path = os.path.relpath(path).replace(os.sep, '/')
+
+    if rel_path == 'tools/generate_galleries.py':
+        return 'galleries-config'
+    if rel_path.startswith('tools/') and rel_path.endswith('.py'):
+        return 'config'
+    if rel_path.startswith(('templates/', 'components/', 'data/')):
+        return 'pages'
+    if rel_path.startswith('images/'):
+        return 'galleries'
+    return 'static'
+
+def handle_changes(changed):
+    """
+    Routes a debounced batch of changes to the right actions and runs them.
+    Returns the set of action kinds that were triggered.
+    """
+    actions = set()
+    for path in sorted(changed):
+        kind = classify_change(path)
+        actions.add(kind)
+        print(f"  > Change detected in {os.path.relpath(path)} ({kind})")
+
+    # Handle Configuration Change (Hot Reload)
+    if 'config' in actions:
+        print("  ↻ Configuration changed. Reloading build_site.py and its render modules...")
+        try:
+            # Force Python to re-read the render modules first, then build_site.py so it binds the new code
+            for module in build_site.RENDER_MODULES:
+                importlib.reload(module)
+            importlib.reload(build_site)
+            actions.add('pages')
+        except Exception as e:
+            print(f"  [!] Error reloading configuration: {e}")
+            print("      Fix the error in build_site.py and save again.")
+            actions.discard('pages')  # Don't try to build if config is broken
+
+    if 'galleries-config' in actions:
+        print("  ↻ Gallery configuration changed. Reloading generate_galleries.py...")
+        try:
+            importlib.reload(generate_galleries)
+            actions.add('galleries')
+        except Exception as e:
+            print(f"  [!] Error reloading generate_galleries.py: {e}")
+            actions.discard('galleries')
+
+    # Incremental gallery regeneration (unchanged images are served from the scan cache)
+    if 'galleries' in actions:
+        print("⚡ Regenerating galleries...")
+        try:
+            generate_galleries.generate_site()
+            actions.add('pages')  # The portfolio component may have changed
+        except Exception as e:
+            print(f"  [!] Error during gallery generation: {e}")
+
+    # Run Build if needed (only pages affected by the change are rebuilt)
+    if 'pages' in actions:
+        print("⚡ Rebuilding site...")
+        try:
+            build_site.build_site()
+        except Exception as e:
+            print(f"  [!] Error during build: {e}")
+            print("      Fix the error and save again.")
+
+    if actions == {'static'}:
+        print("  (Static asset changed, nothing to rebuild.)")
+
+    return actions
+
+def get_debounce_arg(argv):
+    """
+    Parses '--debounce SECONDS' from the command line.
+    """
+    if '--debounce' in argv:
+        index = argv.index('--debounce')
+        try:
+            return float(argv[index + 1])
+        except (IndexError, ValueError):
+            print(f"Warning: Invalid --debounce value, using {DEBOUNCE_SECONDS}s.")
+    return DEBOUNCE_SECONDS
+
+def main():
+    debounce = get_debounce_arg(sys.argv)
+    watcher = create_watcher()
+
+    print(f"👀 Watcher started ({type(watcher).__name__}, debounce {debounce * 1000:.0f} ms).")
+    print("   (Edit 'tools/build_site.py' to add new pages/components - I will auto-reload!)")
+    print("(Press Ctrl+C to stop)")
+
+    while True:
+        try:
+            changed = wait_for_changes(watcher, debounce)
+            handle_changes(changed)
+        except KeyboardInterrupt:
+            print("\nStopping watcher.")
+            sys.exit(0)
+
+if __name__ == "__main__":
+    main()